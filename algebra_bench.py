@@ -0,0 +1,177 @@
+import algebra_classes as alg_cl
+import algebra_ui as alg_ui
+
+def generate(size: int, depth: int = 2, operators: str = '+*', variables: int = 5, equation: str = '=', seed: int = 0) -> str:
+    '''Generates a random expression string of about size numbers and variables, nesting brackets at most depth deep.'''
+    import random
+    rng = random.Random(seed)
+    def chain(size: int, level: int) -> str:
+        pieces = []
+        while size > 0:
+            if level < depth and size > 2 and rng.random() < 0.2:
+                group = rng.randint(2, max(2, size // 2))
+                pieces.append('('+chain(group, level + 1)+')')
+                size -= group
+            else:
+                if variables > 0 and rng.random() < 0.5:
+                    pieces.append('x'+str(rng.randrange(variables)))
+                else:
+                    pieces.append(str(rng.randint(1, 99)))
+                size -= 1
+        joined = [pieces[0]]
+        for piece in pieces[1:]:
+            joined.append(rng.choice(operators))
+            joined.append(piece)
+        return ''.join(joined)
+    if not equation:
+        return chain(size, 0)
+    return chain(max(1, size // 2), 0)+equation+chain(max(1, size - size // 2), 0)
+
+def measure(stage: str, function, items: int, repeat: int) -> dict:
+    '''Times the best of repeat calls to function and separately traces the peak memory of one call.'''
+    import time
+    import tracemalloc
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best:
+            best = seconds
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'stage' : stage, 'seconds' : best, 'throughput' : items / best if best > 0 else float('inf'), 'peak_bytes' : peak}
+
+def pipeline(exp_str: str, repeat: int) -> list:
+    '''Benchmarks each stage of identifying, comparing and evaluating given exp_str.'''
+    tokens = alg_ui.tokenize(exp_str)
+    parts = alg_cl.Variable.classify(alg_cl.Constant.classify(list(tokens)))
+    exp = alg_ui.parse(parts)
+    other = alg_ui.parse(alg_cl.Variable.classify(alg_cl.Constant.classify(list(tokens))))
+    names = sorted(set(part.name for part in parts if isinstance(part, alg_cl.Variable)))
+    compiled = exp.compile(names)
+    values = [1.5] * len(names)
+    constants = [alg_cl.Constant(float(i)) for i in range(len(tokens) // 2 + 2)]
+    def fold(operation: type):
+        folded = operation(*constants)
+        while isinstance(folded, alg_cl.Operation):
+            folded = folded.evaluate(0, len(folded.parts) - 1)
+    stages = (('tokenize', lambda: alg_ui.tokenize(exp_str), len(exp_str)),
+              ('Constant.classify', lambda: alg_cl.Constant.classify(list(tokens)), len(tokens)),
+              ('Variable.classify', lambda: alg_cl.Variable.classify(alg_cl.Constant.classify(list(tokens))), len(tokens)),
+              ('Operation.classify', lambda: alg_cl.Sum.classify(*alg_cl.Product.classify(*parts)), len(parts)),
+              ('parse', lambda: alg_ui.parse(parts), len(parts)),
+              ('Operation.__eq__', lambda: exp == other, len(parts)),
+              ('Sum.evaluate', lambda: fold(alg_cl.Sum), len(constants)),
+              ('Product.evaluate', lambda: fold(alg_cl.Product), len(constants)),
+              ('compile', lambda: exp.compile(names), len(parts)),
+              ('compiled call', lambda: compiled(*values), len(parts)),
+              ('simplify', lambda: exp.simplify(), len(parts)))
+    results = []
+    for stage, function, items in stages:
+        results.append(measure(stage, function, items, repeat))
+    return results
+
+def backends(exp_str: str, repeat: int, names: list = None) -> list:
+    '''Benchmarks classifying, folding and simplifying given exp_str with each of the named numeric backends.'''
+    tokens = alg_ui.tokenize(exp_str)
+    numbers = [token for token in tokens if token.replace('.', '', 1).isdecimal()]
+    previous = alg_cl.BACKEND
+    results = []
+    try:
+        for name in names if names is not None else list(alg_cl.BACKENDS):
+            alg_cl.set_backend(name)
+            exp = alg_ui.parse(alg_cl.Variable.classify(alg_cl.Constant.classify(list(tokens))))
+            constants = alg_cl.Constant.classify(list(numbers))
+            def fold():
+                folded = alg_cl.Sum(*constants)
+                while isinstance(folded, alg_cl.Operation):
+                    folded = folded.evaluate(0, len(folded.parts) - 1)
+            stages = (('Constant.classify', lambda: alg_cl.Constant.classify(list(tokens)), len(tokens)),
+                      ('Sum.evaluate', fold, len(constants)),
+                      ('simplify', lambda: exp.simplify(), len(tokens)))
+            for stage, function, items in stages:
+                results.append(measure(stage+' ('+name+')', function, items, repeat))
+    finally:
+        alg_cl.set_backend(previous)
+    return results
+
+def cold_start(module: str, repeat: int = 10) -> dict:
+    '''Measures the median time a fresh interpreter takes to import given module, less its own start up time.'''
+    import statistics
+    import subprocess
+    import sys
+    import time
+    def median_run(code: str) -> float:
+        times = []
+        for i in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], check=True)
+            times.append(time.perf_counter() - start)
+        return statistics.median(times)
+    baseline = median_run('pass')
+    seconds = median_run('import '+module)
+    return {'stage' : 'import '+module, 'seconds' : max(seconds - baseline, 0.0), 'repeat' : repeat}
+
+def compare(results: list, previous: list, threshold: float) -> list:
+    '''Returns the results that are slower than the matching previous results by more than threshold.'''
+    before = dict()
+    for result in previous:
+        before[(result['stage'], result.get('size'))] = result
+    regressions = []
+    for result in results:
+        old = before.get((result['stage'], result.get('size')))
+        if old is not None and old['seconds'] > 0 and result['seconds'] > old['seconds'] * (1 + threshold):
+            regressions.append(dict(result, previous_seconds=old['seconds']))
+    return regressions
+
+def main(argv: list = None) -> list:
+    '''Runs the benchmarks, printing their results and optionally saving or comparing them as JSON.'''
+    import argparse
+    import json
+    import platform
+    import time
+    parser = argparse.ArgumentParser(description='Benchmarks the algebraic expression solver.')
+    parser.add_argument('--sizes', default='100,1000,10000', help='comma separated numbers of values in the generated expressions')
+    parser.add_argument('--depth', type=int, default=2, help='deepest bracket nesting of the generated expressions')
+    parser.add_argument('--operators', default='+*', help='operation symbols to mix, repeat a symbol to weight it')
+    parser.add_argument('--variables', type=int, default=5, help='number of distinct variables')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the expression generator')
+    parser.add_argument('--repeat', type=int, default=5, help='number of times each measurement is repeated')
+    parser.add_argument('--backends', default=','.join(alg_cl.BACKENDS), help='comma separated numeric backends to compare, or nothing to skip them')
+    parser.add_argument('--no-cold-start', action='store_true', help='skip measuring the import times')
+    parser.add_argument('--output', metavar='FILE', help='where the results are saved as JSON')
+    parser.add_argument('--compare', metavar='FILE', help='earlier results to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.1, help='slowdown fraction reported as a regression')
+    args = parser.parse_args(argv)
+    results = []
+    for size in args.sizes.split(','):
+        exp_str = generate(int(size), args.depth, args.operators, args.variables, seed=args.seed)
+        stage_results = pipeline(exp_str, args.repeat)
+        if args.backends:
+            stage_results.extend(backends(exp_str, args.repeat, args.backends.split(',')))
+        for result in stage_results:
+            result['size'] = int(size)
+            results.append(result)
+            print(result['stage']+' ['+size+'] : '+format(result['seconds']*1000, '.3f')+' ms, '+format(result['throughput'], '.0f')+' items/s, '+str(result['peak_bytes'])+' bytes peak')
+    if not args.no_cold_start:
+        for module in ('algebra_classes', 'algebra_ui'):
+            result = cold_start(module, args.repeat)
+            print(result['stage']+' : '+format(result['seconds']*1000, '.2f')+' ms')
+            results.append(result)
+    if args.compare is not None:
+        with open(args.compare) as previous:
+            regressions = compare(results, json.load(previous)['results'], args.threshold)
+        for result in regressions:
+            print('!regression '+result['stage']+' ['+str(result.get('size'))+'] : '+format(result['previous_seconds']*1000, '.3f')+' ms -> '+format(result['seconds']*1000, '.3f')+' ms')
+    if args.output is not None:
+        with open(args.output, 'w') as output:
+            json.dump({'time' : time.time(), 'python' : platform.python_version(), 'arguments' : vars(args), 'results' : results}, output, indent=1)
+    return results
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,170 @@
-class Constant:
+import keyword
+import math
+import numbers
+import weakref
+
+class _Node():
+    '''Base class giving expression nodes their slots and making them immutable once interned or frozen.'''
+
+    __slots__ = ('_hash', '_simplified', '_order', '__weakref__')
+
+    def __setattr__(self, name: str, value):
+        if getattr(self, '_hash', None) is not None:
+            raise AttributeError('Interned '+type(self).__name__+'s are immutable')
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name: str):
+        if getattr(self, '_hash', None) is not None:
+            raise AttributeError('Interned '+type(self).__name__+'s are immutable')
+        object.__delattr__(self, name)
+
+    @property
+    def interned(self) -> bool:
+        '''Whether this node is immutable, either the shared node returned by intern() or a copy returned by freeze().'''
+        return getattr(self, '_hash', None) is not None
+
+    def compile(self, variables: list = None) -> 'function':
+        '''Compiles this expression into a Python function taking the given variable names as arguments.'''
+        global COMPILE_WIDTH
+        #collect the distinct nodes in post order so shared nodes are only computed once
+        found = []
+        order = []
+        seen = set()
+        stack = [(self, False)]
+        while stack:
+            node, ready = stack.pop()
+            if id(node) in seen:
+                continue
+            if isinstance(node, Variable):
+                seen.add(id(node))
+                if node.name not in found:
+                    found.append(node.name)
+            elif isinstance(node, Constant):
+                seen.add(id(node))
+            elif ready:
+                seen.add(id(node))
+                order.append(node)
+            else:
+                stack.append((node, True))
+                children = node.parts if isinstance(node, Operation) else (node.lhs, node.rhs)
+                for child in reversed(children):
+                    stack.append((child, False))
+        if variables is None:
+            variables = found
+        else:
+            variables = list(variables)
+            for name in found:
+                if name not in variables:
+                    raise ValueError('Variable '+repr(name)+' is not one of the compiled variables')
+        for name in variables:
+            if not isinstance(name, str) or not name.isidentifier() or keyword.iskeyword(name):
+                raise ValueError('Variable '+repr(name)+' cannot be used as a compiled argument')
+        #generated names use a prefix that no argument starts with
+        prefix = '_'
+        while any(name.startswith(prefix) for name in variables):
+            prefix += '_'
+        namespace = dict()
+        names = dict()
+        def source(node) -> str:
+            if isinstance(node, Variable):
+                return node.name
+            if isinstance(node, Constant):
+                value = node.value
+                if type(value) is int or (type(value) is float and math.isfinite(value)):
+                    return repr(value)
+                name = prefix+'c'+str(len(namespace))
+                namespace[name] = value
+                return name
+            return names[id(node)]
+        lines = ['def '+prefix+'compiled('+', '.join(variables)+'):']
+        for node in order:
+            children = node.parts if isinstance(node, Operation) else (node.lhs, node.rhs)
+            name = prefix+'t'+str(len(names))
+            names[id(node)] = name
+            symbol = ' '+node.python_symbol+' '
+            sources = [source(child) for child in children]
+            #wide operations are built up over statements of bounded width, since the compiler recurses once per operator of a statement
+            lines.append('    '+name+' = '+symbol.join(sources[:COMPILE_WIDTH]))
+            for i in range(COMPILE_WIDTH, len(sources), COMPILE_WIDTH):
+                lines.append('    '+name+' = '+symbol.join([name] + sources[i:i+COMPILE_WIDTH]))
+        lines.append('    return '+source(self))
+        exec('\n'.join(lines), namespace)
+        return namespace[prefix+'compiled']
+
+    def evaluate_batch(self, columns: dict) -> 'numpy.ndarray':
+        '''Evaluates this expression with whole array operations over columns of variable values keyed by name.'''
+        import numpy
+        arrays = dict()
+        shape = None
+        for name in columns:
+            column = columns[name]
+            if not isinstance(column, numpy.ndarray):
+                #array.array and other buffer objects are viewed without copying
+                try:
+                    column = numpy.asarray(memoryview(column))
+                except TypeError:
+                    column = numpy.asarray(column)
+            if shape is None:
+                shape = column.shape
+            elif column.shape != shape:
+                raise ValueError('Column '+repr(name)+' has shape '+str(column.shape)+' instead of '+str(shape))
+            arrays[name] = column
+        result = self.compile(arrays)(**arrays)
+        if shape is None:
+            shape = ()
+        if numpy.shape(result) != shape:
+            #constant expressions and sides are spread across every row
+            result = numpy.full(shape, result)
+        return numpy.asarray(result)
+
+    def simplify(self) -> '_Node':
+        '''Returns a new interned tree with constants folded, nested operations flattened and like terms collected.'''
+        #the tree is interned first and every interned node remembers its result, so simplifying a tree again is free while its interned nodes are alive
+        return _simplify(intern(self))
+
+    def diff(self, variable: str) -> '_Node':
+        '''Returns the interned derivative of this tree with respect to the named variable, sharing common subexpressions.'''
+        if not isinstance(variable, str):
+            raise TypeError('Expressions can only be differentiated by a variable name, not a '+str(type(variable)))
+        #interning merges repeated subexpressions so each distinct one is differentiated once
+        root = intern(self)
+        derivatives = dict()
+        stack = [root]
+        while stack:
+            node = stack[-1]
+            if id(node) in derivatives:
+                stack.pop()
+                continue
+            if isinstance(node, Constant):
+                derivatives[id(node)] = intern(Constant(0))
+                continue
+            if isinstance(node, Variable):
+                derivatives[id(node)] = intern(Constant(1 if node.name == variable else 0))
+                continue
+            children = node.parts if isinstance(node, Operation) else (node.lhs, node.rhs)
+            pending = [child for child in children if id(child) not in derivatives]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            if isinstance(node, Sum):
+                derivatives[id(node)] = _sum_of([derivatives[id(part)] for part in node.parts])
+            elif isinstance(node, Product):
+                derivatives[id(node)] = _product_rule(node.parts, derivatives)
+            elif isinstance(node, Equation):
+                derivatives[id(node)] = intern(type(node)(derivatives[id(node.lhs)], derivatives[id(node.rhs)]))
+            else:
+                raise TypeError('Cannot differentiate a '+str(type(node)))
+        return derivatives[id(root)]
+
+class Constant(_Node):
     '''Used to classify constants identified in algebraic expressions.'''
+
+    __slots__ = ('value',)
     
-    def __init__(self, value: (int, float)):
-        if (isinstance(value, (int, float))):
+    def __init__(self, value: numbers.Number):
+        #any real number type is accepted, including Decimal which is not registered as Real
+        if isinstance(value, numbers.Real) or (isinstance(value, numbers.Number) and not isinstance(value, numbers.Complex)):
             self.value = value
         else:
             raise TypeError('Constants must be given a number, not a '+str(type(value)))
@@ -31,6 +193,9 @@ class Constant:
         else:
             return False
 
+    def __hash__(self) -> int:
+        return hash(self.value)
+
     def __le__(self, other: 'Constant') -> bool:
         return self < other or self == other
 
@@ -41,11 +206,13 @@ class Constant:
         '''Clasifies numeric items in given parts as constants.'''
         if not isinstance(parts, list):
             raise TypeError('Constant.classify() only accepts list types, not '+type(parts)+' types')
+        global BACKENDS, BACKEND
+        convert = BACKENDS[BACKEND]
         i = 0
         while i < len(parts):
             try:
-                if parts[i].isdecimal():
-                    parts[i] = Constant(float(parts[i]))
+                if parts[i].replace('.', '', 1).isdecimal():
+                    parts[i] = Constant(convert(parts[i]))
             except AttributeError:
                 pass
             except:
@@ -53,8 +220,10 @@ class Constant:
             i += 1
         return parts
 
-class Variable():
+class Variable(_Node):
     '''Used to classify variables identified in algebraic expressions.'''
+
+    __slots__ = ('name',)
     
     def __init__(self, name: str):
         if isinstance(name, str):
@@ -74,6 +243,9 @@ class Variable():
             return self.name == other.name
         else:
             return False
+
+    def __hash__(self) -> int:
+        return hash(self.name)
         
     def classify(parts: list) -> list:
         '''Clasifies alphabetic items in given parts as variables.'''
@@ -91,10 +263,13 @@ class Variable():
             i += 1
         return parts
 
-class Operation():
+class Operation(_Node):
     '''Base class for algebraic operation classes.'''
 
+    __slots__ = ('parts',)
     symbol = NotImplemented
+    python_symbol = NotImplemented
+    precedence = 1
 
     def __init__(self, *parts: (Constant, Variable, 'Operation')):
         if len(parts) < 2:
@@ -114,20 +289,41 @@ class Operation():
         raise NotImplementedError('__str__ should be overridded by derivitive classes')
 
     def __eq__(self, other: 'Operation') -> bool:
+        if self is other:
+            return True
         if not isinstance(other, Operation):
             return False
         if type(self) != type(other):
             return False
         if len(self.parts) != len(other.parts):
             return False
-        i = 0
-        while i < len(self.parts):
-            value = self.parts[i]
-            if self.parts.count(value) != other.parts.count(value):
-                return False
-            i += 1
-        else:
-            return True
+        if self.interned and other.interned and self._hash != other._hash:
+            return False
+        #structurally equal subtrees of both operations share one id, so every subtree is visited once however deep
+        table = dict()
+        return _canonical(self, table) == _canonical(other, table)
+
+    def __hash__(self) -> int:
+        if self.interned:
+            return self._hash
+        #parts are mixed and summed so that the order of the parts does not matter, hashing nested operations in post order on an explicit stack
+        hashes = dict()
+        stack = [self]
+        while stack:
+            node = stack[-1]
+            if id(node) in hashes:
+                stack.pop()
+                continue
+            pending = [part for part in node.parts if isinstance(part, Operation) and not part.interned and id(part) not in hashes]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            total = 0
+            for part in node.parts:
+                total += hash((_Hash(hashes[id(part)]) if id(part) in hashes else part,))
+            hashes[id(node)] = hash((type(node), len(node.parts), total))
+        return hashes[id(self)]
 
     def evaluate(self, lhs_i: int, rhs_i: int) -> ('Operation', Constant):
         raise NotImplementedError('evaluate() should be overridden by derivitive classes')
@@ -137,66 +333,56 @@ class Operation():
             raise TypeError('Operation.classify() subclass argument must be a derivitive class of Operation, not '+subclass.__bases__)
         if subclass.symbol == NotImplemented:
             raise NotImplementedError('Operation.symbol should be overridden in derivitive classes to use Operation.classify()')
-        parts = list(parts)
+        #a single pass that gathers each run of symbol separated parts before building its operation
+        operands = (Constant, Variable, Operation)
+        result = []
+        pending = []
         i = 0
         while i < len(parts):
-            part = parts.pop(i)
-            if part == subclass.symbol:
-                try:
-                    i -= 1
-                    lhs = parts.pop(i)
-                    rhs = parts.pop(i)
-                except IndexError:
+            part = parts[i]
+            if isinstance(part, str) and part == subclass.symbol:
+                if i + 1 >= len(parts) or not (pending or result):
                     raise ValueError('Impossible equation')
-                except:
-                    raise
-                args = []
-                if isinstance(lhs, subclass):
-                    for part in lhs.parts:
-                        args.append(part)
-                else:
-                    args.append(lhs)
-                if isinstance(rhs, subclass):
-                    for part in rhs.parts:
-                        args.append(part)
-                else:
-                    args.append(rhs)
-                try:
-                    parts.insert(i, subclass(*args))
-                    subclass.classify(parts)
-                    i += 1
-                except TypeError:
-                    parts.insert(i, rhs)
-                    parts.insert(i, part)
-                    parts.insert(i, lhs)
+                rhs = parts[i+1]
+                if not pending and isinstance(result[-1], operands) and isinstance(rhs, operands):
+                    lhs = result.pop()
+                    if isinstance(lhs, subclass):
+                        pending.extend(lhs.parts)
+                    else:
+                        pending.append(lhs)
+                if pending and isinstance(rhs, operands):
+                    if isinstance(rhs, subclass):
+                        pending.extend(rhs.parts)
+                    else:
+                        pending.append(rhs)
                     i += 2
-                except:
-                    raise
-                
-            else:
-                parts.insert(i, part)
-                i += 1
-        if len(parts) == 1:
-            return parts[0]
+                    continue
+            if pending:
+                result.append(subclass(*pending))
+                pending = []
+            result.append(part)
+            i += 1
+        if pending:
+            result.append(subclass(*pending))
+        if len(result) == 1:
+            return result[0]
         else:
-            return parts
+            return result
 
 class Sum(Operation):
     '''Used for representing addition in algebraic expressions.'''
 
+    __slots__ = ()
+
     symbol = '+'
+    python_symbol = '+'
+    precedence = 1
     
     def __repr__(self) -> str:
-        rep = 'Sum('
-        for part in self.parts:
-            rep += repr(part)+','
-        return rep[0:-1]+')'
+        return represent(self)
 
     def __str__(self) -> str:
-        string = '('
-        for part in self.parts:
-            string += str(part)+' + '
-        return string[0:-3]+')'
+        return render(self)
 
     def evaluate(self, lhs_i: int, rhs_i: int) ->('Sum', Constant):
         if not isinstance(self.parts[lhs_i], Constant):
@@ -206,6 +392,12 @@ class Sum(Operation):
         value = self.parts[lhs_i].value + self.parts[rhs_i].value
         if len(self.parts) == 2:
             return Constant(value)
+        elif self.interned:
+            #interned operations are shared so the result is built as a new operation
+            parts = list(self.parts)
+            parts[lhs_i] = Constant(value)
+            parts.pop(rhs_i)
+            return type(self)(*parts)
         else:
             self.parts[lhs_i] = Constant(value)
             self.parts.pop(rhs_i)
@@ -217,19 +409,17 @@ class Sum(Operation):
 class Product(Operation):
     '''Used to represent muliplication in algebraic expressions.'''
 
+    __slots__ = ()
+
     symbol = '*'
+    python_symbol = '*'
+    precedence = 2
     
     def __repr__(self) -> str:
-        rep = 'Product('
-        for part in self.parts:
-            rep += repr(part)+','
-        return rep[0:-1]+')'
+        return represent(self)
 
     def __str__(self) -> str:
-        string = '('
-        for part in self.parts:
-            string += str(part)+' * '
-        return string[0:-3]+')'
+        return render(self)
 
     def evaluate(self, lhs_i: int, rhs_i: int) -> ('Product', Constant):
         if not isinstance(self.parts[lhs_i], Constant):
@@ -239,6 +429,12 @@ class Product(Operation):
         value = self.parts[lhs_i].value * self.parts[rhs_i].value
         if len(self.parts) == 2:
             return Constant(value)
+        elif self.interned:
+            #interned operations are shared so the result is built as a new operation
+            parts = list(self.parts)
+            parts[lhs_i] = Constant(value)
+            parts.pop(rhs_i)
+            return type(self)(*parts)
         else:
             self.parts[lhs_i] = Constant(value)
             self.parts.pop(rhs_i)
@@ -247,10 +443,15 @@ class Product(Operation):
     def classify(*parts: (str, Constant, Variable, Operation)) -> ('Product', list):
         return Operation.classify(__class__, *parts)
 
-class Equation():
+class Equation(_Node):
     '''Used as a base class for equations.'''
 
+    __slots__ = ('lhs', 'rhs')
+
     symbol = NotImplemented
+    python_symbol = NotImplemented
+    converse_symbol = NotImplemented
+    precedence = 0
     
     def __init__(self, lhs: (Operation, Variable, Constant), rhs: (Operation, Variable, Constant)) -> 'Equation':
         if not isinstance(lhs, (Operation, Variable, Constant)):
@@ -268,10 +469,21 @@ class Equation():
         raise NotImplemented('Equation__str__() should be defined in derivitive class')
 
     def __eq__(self, other):
+        if self is other:
+            return True
         if not isinstance(other, Equation):
             return False
+        if self.interned and other.interned and self._hash != other._hash:
+            return False
         return (type(self) == type(other)) and (self.lhs == other.lhs) and (self.rhs == other.rhs)
 
+    def __hash__(self) -> int:
+        if self.interned:
+            return self._hash
+        #an equation hashes the same as its converse with the sides swapped
+        family = frozenset((self.symbol, self.converse_symbol))
+        return hash((family, hash((self.lhs,)) + hash((self.rhs,))))
+
     def classify(subclass, *parts: (str, Constant, Variable, Operation)) -> ('Equation', list):
         if not issubclass(subclass, Equation):
             raise TypeError('Equation.classify() subclass argument must be a derivitive class of Equation, not '+subclass.__bases__)
@@ -290,7 +502,11 @@ class Equation():
 class Equal(Equation):
     '''Used to represent equality equations.'''
 
+    __slots__ = ()
+
     symbol = '='
+    python_symbol = '=='
+    converse_symbol = '='
     
     def __repr__(self) -> str:
         return 'Equal('+repr(self.lhs)+','+repr(self.rhs)+')'
@@ -301,13 +517,19 @@ class Equal(Equation):
     def __eq__(self, other) -> bool:
         return Equation.__eq__(self, other) or (isinstance(other, Equal) and (self.lhs == other.rhs) and (self.rhs == other.lhs))
 
+    __hash__ = Equation.__hash__
+
     def classify(*parts: (str, Constant, Variable, Operation)) -> ('Equal', list):
         return Equation.classify(__class__, *parts)
 
 class Greater(Equation):
     '''Used to represent inequality equations where the left hand side is greater than the right hand side.'''
 
+    __slots__ = ()
+
     symbol = '>'
+    python_symbol = '>'
+    converse_symbol = '<'
 
     def __repr__(self) -> str:
         return 'Greater('+repr(self.lhs)+','+repr(self.rhs)+')'
@@ -318,13 +540,19 @@ class Greater(Equation):
     def __eq__(self, other) -> bool:
         return Equation.__eq__(self, other) or (isinstance(other, Lesser) and (self.lhs == other.rhs) and (self.rhs == other.lhs))
     
+    __hash__ = Equation.__hash__
+
     def classify(*parts: (str, Constant, Variable, Operation)) -> ('Greater', list):
         return Equation.classify(__class__, *parts)
 
 class Lesser(Equation):
     '''Used to represent inequality equations where the left hand side is lesser than the right hand side.'''
 
+    __slots__ = ()
+
     symbol = '<'
+    python_symbol = '<'
+    converse_symbol = '>'
 
     def __repr__(self) -> str:
         return 'Lesser('+repr(self.lhs)+','+repr(self.rhs)+')'
@@ -335,13 +563,19 @@ class Lesser(Equation):
     def __eq__(self, other) -> bool:
         return Equation.__eq__(self, other) or (isinstance(other, Greater) and (self.lhs == other.rhs) and (self.rhs == other.lhs))
     
+    __hash__ = Equation.__hash__
+
     def classify(*parts: (str, Constant, Variable, Operation)) -> ('Lesser', list):
         return Equation.classify(__class__, *parts)
 
 class GreaterEqual(Equation):
     '''Used to represent inequality equations where the left hand side is greater than or equal to the right hand side.'''
 
+    __slots__ = ()
+
     symbol = '>='
+    python_symbol = '>='
+    converse_symbol = '<='
 
     def __repr__(self) -> str:
         return 'GreaterEqual('+repr(self.lhs)+','+repr(self.rhs)+')'
@@ -352,13 +586,19 @@ class GreaterEqual(Equation):
     def __eq__(self, other) -> bool:
         return Equation.__eq__(self, other) or (isinstance(other, LesserEqual) and (self.lhs == other.rhs) and (self.rhs == other.lhs))
     
+    __hash__ = Equation.__hash__
+
     def classify(*parts: (str, Constant, Variable, Operation)) -> ('GreaterEqual', list):
         return Equation.classify(__class__, *parts)
 
 class LesserEqual(Equation):
     '''Used to represent inequality equations where the left hand side is lesser thn or equal to the right hand side.'''
 
+    __slots__ = ()
+
     symbol = '<='
+    python_symbol = '<='
+    converse_symbol = '>='
 
     def __repr__(self) -> str:
         return 'LesserEqual('+repr(self.lhs)+','+repr(self.rhs)+')'
@@ -369,13 +609,19 @@ class LesserEqual(Equation):
     def __eq__(self, other) -> bool:
         return Equation.__eq__(self, other) or (isinstance(other, GreaterEqual) and (self.lhs == other.rhs) and (self.rhs == other.lhs))
     
+    __hash__ = Equation.__hash__
+
     def classify(*parts: (str, Constant, Variable, Operation)) -> ('LesserEqual', list):
         return Equation.classify(__class__, *parts)
 
 class NotEqual(Equation):
     '''Used to represent inequalities where the left hand side is not equal to the right hand side.'''
 
+    __slots__ = ()
+
     symbol = '!='
+    python_symbol = '!='
+    converse_symbol = '!='
 
     def __repr__(self) -> str:
         return 'NotEqual('+repr(self.lhs)+','+repr(self.rhs)+')'
@@ -386,89 +632,411 @@ class NotEqual(Equation):
     def __eq__(self, other) -> bool:
         return Equation.__eq__(self, other) or (isinstance(other, NotEqual) and (self.lhs == other.rhs) and (self.rhs == other.lhs))
     
+    __hash__ = Equation.__hash__
+
     def classify(*parts: (str, Constant, Variable, Operation)) -> ('NotEqual', list):
         return Equation.classify(__class__, *parts)
 
-#Constant tests
-assert Constant(5).value==5
-assert repr(Constant(5))=='Constant(5)'
-assert str(Constant(5))=='5'
-assert Constant(5)>Constant(4)
-assert Constant(4)<Constant(5)
-assert Constant(3.4)==Constant(3.4)
-assert Constant(2.0)<=Constant(2)
-assert Constant(23)>=Constant(5.6)
-assert Constant(-3)!=Constant(7/2)
-assert Constant.classify(['12','=','3','*','x'])==[Constant(12),'=',Constant(3),'*','x']
-
-#Variable tests
-assert Variable('x').name=='x'
-assert repr(Variable('x'))=='Variable(\'x\')'
-assert str(Variable('c'))=='c'
-assert Variable('sd')==Variable('sd')
-assert Variable('er')!=Variable('speed')
-assert Variable.classify([Constant(12),'=',Constant(3),'*','x'])==[Constant(12),'=',Constant(3),'*',Variable('x')]
-
-#Operation tests
-assert Operation(Constant(5),Variable('x')).parts==[Constant(5),Variable('x')]
-assert Operation(Constant(4),Variable('r'),Operation(Constant(6),Variable('x')))==Operation(Constant(4),Variable('r'),Operation(Constant(6),Variable('x')))
-
-#Sum tests
-assert repr(Sum(Constant(5),Variable('x')))=='Sum(Constant(5),Variable(\'x\'))'
-assert str(Sum(Constant(5),Variable('x')))=='(5 + x)'
-assert Sum(Constant(5),Constant(4)).evaluate(0,1)==Constant(9)
-assert Sum(Constant(5),Variable('x'),Constant(4)).evaluate(0,2)==Sum(Constant(9),Variable('x'))
-assert Sum.classify(Constant(1),Sum.symbol,Constant(2),Sum.symbol,Variable('x'))==Sum(Constant(1),Constant(2),Variable('x'))
-
-#Product tests
-assert repr(Product(Constant(5),Variable('x')))=='Product(Constant(5),Variable(\'x\'))'
-assert str(Product(Constant(5),Variable('x')))=='(5 * x)'
-assert Product(Constant(5),Constant(4)).evaluate(1,0)==Constant(20)
-assert Product(Constant(5),Variable('x'),Constant(4)).evaluate(2,0)==Product(Variable('x'),Constant(20))
-assert Product.classify(Constant(1),Product.symbol,Constant(2),Product.symbol,Variable('x'))==Product(Constant(1),Constant(2),Variable('x'))
-
-#Equation tests
-assert Equation(Variable('velocity'),Variable('t')).lhs==Variable('velocity')
-assert Equation(Constant(3.456),Constant(127)).rhs==Constant(127)
-assert Equation(Constant(5),Variable('x'))==Equation(Constant(5),Variable('x'))
-
-#Equal tests
-assert repr(Equal(Variable('x'),Constant(5)))=='Equal(Variable(\'x\'),Constant(5))'
-assert str(Equal(Constant(12.78),Constant(45)))=='12.78 = 45'
-assert Equal(Constant(5),Variable('f'))==Equal(Variable('f'),Constant(5))
-assert Equal(Constant(78),Sum(Constant(3),Variable('y')))==Equal(Constant(78),Sum(Constant(3),Variable('y')))
-assert Equal.classify(Variable('x'),Equal.symbol,Constant(5))==Equal(Variable('x'),Constant(5))
-
-#Greater tests
-assert repr(Greater(Constant(7),Variable('d')))=='Greater(Constant(7),Variable(\'d\'))'
-assert str(Greater(Variable('speed'),Constant(89)))=='speed > 89'
-assert Greater(Variable('x'),Constant(5))==Lesser(Constant(5),Variable('x'))
-assert Greater.classify(Variable('y'),Greater.symbol,Sum(Constant(3),Constant(4)))==Greater(Variable('y'),Sum(Constant(3),Constant(4)))
-
-#Lesser tests
-assert repr(Lesser(Constant(3.4),Product(Constant(5),Variable('x'))))=='Lesser(Constant(3.4),Product(Constant(5),Variable(\'x\')))'
-assert str(Lesser(Product(Variable('x'),Constant(90),Variable('y')),Constant(120.45)))=='(x * 90 * y) < 120.45'
-assert Lesser(Sum(Variable('x'),Constant(7)),Product(Constant(8),Constant(23)))==Lesser(Sum(Variable('x'),Constant(7)),Product(Constant(8),Constant(23)))
-assert Lesser(Product(Variable('x'),Sum(Constant(34),Variable('x'))),Constant(45))==Greater(Constant(45),Product(Variable('x'),Sum(Constant(34),Variable('x'))))
-assert Lesser.classify(Constant(5),Lesser.symbol,Sum(Constant(3),Constant(2)))==Lesser(Constant(5),Sum(Constant(3),Constant(2)))
-
-#GreaterEqual tests
-assert repr(GreaterEqual(Variable('x'),Constant(5)))=='GreaterEqual(Variable(\'x\'),Constant(5))'
-assert str(GreaterEqual(Sum(Constant(56),Variable('oxygen'),Constant(3.41)),Variable('hydrogen')))=='(56 + oxygen + 3.41) >= hydrogen'
-assert GreaterEqual(Variable('x'),Product(Variable('x'),Constant(56)))==GreaterEqual(Variable('x'),Product(Variable('x'),Constant(56)))
-assert GreaterEqual(Sum(Variable('x'),Constant(5)),Constant(5))==LesserEqual(Constant(5),Sum(Constant(5),Variable('x')))
-assert GreaterEqual.classify(Sum(Constant(5),Variable('x')),GreaterEqual.symbol,Product(Variable('y'),Constant(1)))==GreaterEqual(Sum(Constant(5),Variable('x')),Product(Variable('y'),Constant(1)))
-
-#LesserEqual tests
-assert repr(LesserEqual(Constant(5),Constant(5)))=='LesserEqual(Constant(5),Constant(5))'
-assert str(LesserEqual(Variable('x'),Product(Variable('x'),Constant(56),Constant(3.4))))=='x <= (x * 56 * 3.4)'
-assert LesserEqual(Variable('dx'),Variable('dy'))==LesserEqual(Variable('dx'),Variable('dy'))
-assert LesserEqual(Sum(Variable('f'),Variable('g')),Constant(7))==GreaterEqual(Constant(7),Sum(Variable('f'),Variable('g')))
-assert LesserEqual.classify(Variable('speed'),LesserEqual.symbol,Constant(100))==LesserEqual(Variable('speed'),Constant(100))
-
-#NotEqual tests
-assert repr(NotEqual(Constant(4),Variable('t')))=='NotEqual(Constant(4),Variable(\'t\'))'
-assert str(NotEqual(Constant(3),Sum(Variable('x'),Variable('y'))))=='3 != (x + y)'
-assert NotEqual(Variable('f'),Product(Constant(4),Constant(4)))==NotEqual(Variable('f'),Product(Constant(4),Constant(4)))
-assert NotEqual(Sum(Variable('x'),Variable('y'),Variable('z')),Product(Constant(34),Constant(56)))==NotEqual(Product(Constant(56),Constant(34)),Sum(Variable('y'),Variable('z'),Variable('x')))
-assert NotEqual.classify(Constant(5),NotEqual.symbol,Product(Variable('f'),Variable('g')))==NotEqual(Constant(5),Product(Variable('f'),Variable('g')))
+def _exact(token: str) -> numbers.Rational:
+    '''Converts given numeric token to an int, or to a Fraction only when it has a fractional part.'''
+    if '.' not in token:
+        return int(token)
+    import fractions
+    return narrow(fractions.Fraction(token))
+
+def _fraction(token: str) -> numbers.Rational:
+    '''Converts given numeric token to a Fraction.'''
+    import fractions
+    return fractions.Fraction(token)
+
+def _decimal(token: str) -> numbers.Number:
+    '''Converts given numeric token to a Decimal.'''
+    import decimal
+    return decimal.Decimal(token)
+
+def set_backend(name: str):
+    '''Selects the number type numeric tokens are classified as.'''
+    global BACKENDS, BACKEND
+    if name not in BACKENDS:
+        raise ValueError('Unknown numeric backend '+repr(name)+', expected one of '+', '.join(BACKENDS))
+    BACKEND = name
+    return
+
+def narrow(value: numbers.Number) -> numbers.Number:
+    '''Returns given Fraction as an int when it is whole, so exact arithmetic stays on machine ints.'''
+    if type(value) is not int and isinstance(value, numbers.Rational) and value.denominator == 1:
+        return int(value.numerator)
+    return value
+
+def divide(numerator: numbers.Number, denominator: numbers.Number) -> numbers.Number:
+    '''Divides given numbers, keeping the quotient of ints and Fractions exact.'''
+    if type(numerator) is int and type(denominator) is int:
+        quotient, remainder = divmod(numerator, denominator)
+        if remainder == 0:
+            return quotient
+    if isinstance(numerator, numbers.Rational) and isinstance(denominator, numbers.Rational):
+        import fractions
+        return narrow(fractions.Fraction(numerator, denominator))
+    return numerator / denominator
+
+BACKENDS = {'float' : float,
+            'exact' : _exact,
+            'fraction' : _fraction,
+            'decimal' : _decimal}
+BACKEND = 'float'
+COMPILE_WIDTH = 200
+
+def render(expression: _Node, stream = None, minimal: bool = False) -> str:
+    '''Writes the str() form of given expression to stream without recursing, or returns it when no stream is given.'''
+    #minimal mode only brackets operations that bind more loosely than the operation containing them
+    pieces = []
+    stack = [(expression, -1 if minimal else None)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            pieces.append(item)
+        else:
+            node, outer = item
+            if isinstance(node, Constant):
+                pieces.append(str(node.value))
+            elif isinstance(node, Variable):
+                pieces.append(node.name)
+            elif isinstance(node, Equation):
+                inner = node.precedence if minimal else None
+                stack.append((node.rhs, inner))
+                stack.append(' '+node.symbol+' ')
+                stack.append((node.lhs, inner))
+            else:
+                inner = node.precedence if minimal else None
+                bracketed = outer is None or node.precedence < outer
+                if bracketed:
+                    stack.append(')')
+                separator = ' '+node.symbol+' '
+                for i in range(len(node.parts) - 1, 0, -1):
+                    stack.append((node.parts[i], inner))
+                    stack.append(separator)
+                stack.append((node.parts[0], inner))
+                if bracketed:
+                    stack.append('(')
+        if stream is not None and len(pieces) >= 4096:
+            stream.write(''.join(pieces))
+            pieces.clear()
+    if stream is None:
+        return ''.join(pieces)
+    stream.write(''.join(pieces))
+    return
+
+def represent(expression: _Node, stream = None) -> str:
+    '''Writes the repr() form of given expression to stream without recursing, or returns it when no stream is given.'''
+    pieces = []
+    stack = [expression]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            pieces.append(item)
+        elif isinstance(item, Constant):
+            pieces.append('Constant('+str(item.value)+')')
+        elif isinstance(item, Variable):
+            pieces.append('Variable('+repr(item.name)+')')
+        else:
+            children = item.parts if isinstance(item, Operation) else (item.lhs, item.rhs)
+            stack.append(')')
+            for i in range(len(children) - 1, 0, -1):
+                stack.append(children[i])
+                stack.append(',')
+            stack.append(children[0])
+            stack.append(type(item).__name__+'(')
+        if stream is not None and len(pieces) >= 4096:
+            stream.write(''.join(pieces))
+            pieces.clear()
+    if stream is None:
+        return ''.join(pieces)
+    stream.write(''.join(pieces))
+    return
+
+def _simplify(root: _Node) -> _Node:
+    '''Simplifies the given interned tree bottom up on an explicit stack, remembering the result on every interned node.'''
+    stack = [root]
+    while stack:
+        node = stack[-1]
+        if getattr(node, '_simplified', None) is not None:
+            stack.pop()
+            continue
+        if isinstance(node, Operation):
+            children = node.parts
+        elif isinstance(node, Equation):
+            children = (node.lhs, node.rhs)
+        else:
+            children = ()
+        pending = [child for child in children if getattr(child, '_simplified', None) is None]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        if isinstance(node, (Constant, Variable)):
+            result = node
+        elif isinstance(node, Equation):
+            result = intern(type(node)(node.lhs._simplified, node.rhs._simplified))
+        else:
+            #nested operations of the same type are flattened into this one
+            parts = []
+            for part in node.parts:
+                part = part._simplified
+                if type(part) == type(node):
+                    parts.extend(part.parts)
+                else:
+                    parts.append(part)
+            if isinstance(node, Sum):
+                result = _collect_terms(parts)
+            elif isinstance(node, Product):
+                result = _fold_factors(parts)
+            else:
+                result = intern(type(node)(*parts))
+        object.__setattr__(result, '_simplified', result)
+        object.__setattr__(node, '_simplified', result)
+    return root._simplified
+
+def _collect_terms(parts: list) -> _Node:
+    '''Builds the simplified Sum of the given simplified parts, folding constants and collecting like terms.'''
+    total = None
+    terms = dict()
+    for part in parts:
+        if isinstance(part, Constant):
+            total = part.value if total is None else total + part.value
+            continue
+        #a term is split into its constant coefficient and the rest of its factors
+        coefficient = 1
+        factors = [part]
+        if isinstance(part, Product) and isinstance(part.parts[0], Constant):
+            coefficient = part.parts[0].value
+            factors = part.parts[1:]
+        term = factors[0] if len(factors) == 1 else intern(Product(*factors))
+        terms[term] = terms[term] + coefficient if term in terms else coefficient
+    parts = []
+    for term in terms:
+        coefficient = terms[term]
+        if coefficient == 0:
+            continue
+        elif coefficient == 1:
+            parts.append(term)
+        elif isinstance(term, Product):
+            parts.append(intern(Product(Constant(coefficient), *term.parts)))
+        else:
+            parts.append(intern(Product(Constant(coefficient), term)))
+    if total is not None and (total != 0 or not parts):
+        parts.append(intern(Constant(total)))
+    if not parts:
+        return intern(Constant(0))
+    if len(parts) == 1:
+        return parts[0]
+    return intern(Sum(*parts))
+
+def _fold_factors(parts: list) -> _Node:
+    '''Builds the simplified Product of the given simplified parts with its constants folded into a leading coefficient.'''
+    coefficient = None
+    factors = []
+    for part in parts:
+        if isinstance(part, Constant):
+            coefficient = part.value if coefficient is None else coefficient * part.value
+        else:
+            factors.append(part)
+    if coefficient is not None:
+        if coefficient == 0 or not factors:
+            return intern(Constant(coefficient))
+        if coefficient != 1:
+            factors.insert(0, intern(Constant(coefficient)))
+    if len(factors) == 1:
+        return factors[0]
+    return intern(Product(*factors))
+
+def _is_constant(node: _Node, value) -> bool:
+    '''Whether given node is a Constant equal to given value.'''
+    return isinstance(node, Constant) and node.value == value
+
+def _sum_of(parts: list) -> _Node:
+    '''Returns the interned Sum of given interned parts without any zero parts.'''
+    parts = [part for part in parts if not _is_constant(part, 0)]
+    if not parts:
+        return intern(Constant(0))
+    if len(parts) == 1:
+        return parts[0]
+    return intern(Sum(*parts))
+
+def _product_of(factors: list) -> _Node:
+    '''Returns the interned Product of given interned factors without any one factors.'''
+    if any(_is_constant(factor, 0) for factor in factors):
+        return intern(Constant(0))
+    factors = [factor for factor in factors if not _is_constant(factor, 1)]
+    if not factors:
+        return intern(Constant(1))
+    if len(factors) == 1:
+        return factors[0]
+    return intern(Product(*factors))
+
+def _product_rule(parts: list, derivatives: dict) -> _Node:
+    '''Differentiates the Product of given parts, sharing the products of the parts before and after each part.'''
+    #each term multiplies the derivative of one part by a shared prefix and suffix product, keeping the result linear in size
+    count = len(parts)
+    prefixes = [parts[0]]
+    for i in range(1, count - 1):
+        prefixes.append(intern(Product(prefixes[-1], parts[i])))
+    suffixes = [parts[-1]]
+    for i in range(count - 2, 0, -1):
+        suffixes.append(intern(Product(parts[i], suffixes[-1])))
+    suffixes.reverse()
+    terms = []
+    for i in range(count):
+        derivative = derivatives[id(parts[i])]
+        if _is_constant(derivative, 0):
+            continue
+        factors = [derivative]
+        if i > 0:
+            factors.insert(0, prefixes[i-1])
+        if i < count - 1:
+            factors.append(suffixes[i])
+        terms.append(_product_of(factors))
+    return _sum_of(terms)
+
+def _canonical(node: _Node, table: dict) -> int:
+    '''Returns the id of given node in given table, which is shared by structurally equal subtrees whatever the order of their parts.'''
+    ids = dict()
+    stack = [node]
+    while stack:
+        top = stack[-1]
+        if id(top) in ids:
+            stack.pop()
+            continue
+        if isinstance(top, Operation):
+            pending = [part for part in top.parts if id(part) not in ids]
+            if pending:
+                stack.extend(pending)
+                continue
+            #the parts of an operation are unordered so their ids are sorted
+            key = (type(top), tuple(sorted(ids[id(part)] for part in top.parts)))
+        else:
+            key = top
+        stack.pop()
+        ids[id(top)] = table.setdefault(key, len(table))
+    return ids[id(node)]
+
+class _Hash():
+    '''Stands in for a node with given hash inside the tuples its hash is mixed with.'''
+
+    __slots__ = ('value',)
+
+    def __init__(self, value: int):
+        self.value = value
+        return
+
+    def __hash__(self) -> int:
+        #an int would be reduced modulo the hash modulus rather than hash to itself
+        return self.value
+
+_INTERNED = weakref.WeakValueDictionary()
+
+def intern(expression: (Constant, Variable, Operation, Equation)) -> (Constant, Variable, Operation, Equation):
+    '''Returns the shared immutable node structurally identical to the given expression.'''
+    if not isinstance(expression, _Node):
+        raise TypeError('Only Constants, Variables, Operations and Equations can be interned, not a '+str(type(expression)))
+    if _shared(expression):
+        return expression
+    #children are interned first, in post order on an explicit stack, so a node is identified by the identities of its children
+    interned = dict()
+    stack = [expression]
+    while stack:
+        node = stack[-1]
+        if id(node) in interned:
+            stack.pop()
+            continue
+        if _shared(node):
+            interned[id(node)] = node
+            stack.pop()
+            continue
+        if isinstance(node, (Operation, Equation)):
+            children = node.parts if isinstance(node, Operation) else (node.lhs, node.rhs)
+            pending = [child for child in children if id(child) not in interned]
+            if pending:
+                stack.extend(pending)
+                continue
+        stack.pop()
+        interned[id(node)] = _intern_node(node, interned)
+    return interned[id(expression)]
+
+def _shared(node: _Node) -> bool:
+    '''Whether given node is the shared node returned by intern(), which unlike a frozen copy has an order key.'''
+    return node.interned and hasattr(node, '_order')
+
+def freeze(expression: (Constant, Variable, Operation, Equation)) -> (Constant, Variable, Operation, Equation):
+    '''Returns an immutable copy of the given expression that keeps the order of its parts and is not shared.'''
+    if not isinstance(expression, _Node):
+        raise TypeError('Only Constants, Variables, Operations and Equations can be frozen, not a '+str(type(expression)))
+    frozen = dict()
+    stack = [expression]
+    while stack:
+        node = stack[-1]
+        if id(node) in frozen:
+            stack.pop()
+            continue
+        if node.interned:
+            frozen[id(node)] = node
+            stack.pop()
+            continue
+        if isinstance(node, Constant):
+            fields = {'value' : node.value}
+        elif isinstance(node, Variable):
+            fields = {'name' : node.name}
+        else:
+            children = node.parts if isinstance(node, Operation) else (node.lhs, node.rhs)
+            pending = [child for child in children if id(child) not in frozen]
+            if pending:
+                stack.extend(pending)
+                continue
+            if isinstance(node, Operation):
+                fields = {'parts' : tuple(frozen[id(part)] for part in node.parts)}
+            else:
+                fields = {'lhs' : frozen[id(node.lhs)], 'rhs' : frozen[id(node.rhs)]}
+        stack.pop()
+        copy = object.__new__(type(node))
+        for name in fields:
+            object.__setattr__(copy, name, fields[name])
+        object.__setattr__(copy, '_hash', hash(copy))
+        frozen[id(node)] = copy
+    return frozen[id(expression)]
+
+def _intern_node(expression: _Node, interned: dict) -> _Node:
+    '''Returns the shared node of given expression, whose children are already interned in given dict keyed by their ids.'''
+    import hashlib
+    if isinstance(expression, Constant):
+        fields = {'value' : expression.value}
+        key = (type(expression), type(expression.value), expression.value)
+        order = (0, type(expression.value).__name__, expression.value)
+    elif isinstance(expression, Variable):
+        fields = {'name' : expression.name}
+        key = (type(expression), expression.name)
+        order = (1, expression.name)
+    elif isinstance(expression, Operation):
+        #the parts of an operation are unordered, so they are kept in one canonical order and reordered operations share one node
+        parts = [interned[id(part)] for part in expression.parts]
+        if isinstance(expression, Sum):
+            #constants lead a product and trail a sum, as they are usually written
+            parts.sort(key=lambda part: (isinstance(part, Constant), part._order))
+        else:
+            parts.sort(key=lambda part: part._order)
+        fields = {'parts' : tuple(parts)}
+        key = (type(expression),) + tuple(id(part) for part in parts)
+        #operations are ordered by a digest of their parts, so order keys stay flat however deep the tree is
+        digest = hashlib.blake2b(repr([part._order for part in parts]).encode('utf-8'), digest_size=16).digest()
+        order = (2, type(expression).__name__, digest)
+    else:
+        fields = {'lhs' : interned[id(expression.lhs)], 'rhs' : interned[id(expression.rhs)]}
+        key = (type(expression), id(fields['lhs']), id(fields['rhs']))
+        order = None
+    node = _INTERNED.get(key)
+    if node is None:
+        node = object.__new__(type(expression))
+        for name in fields:
+            object.__setattr__(node, name, fields[name])
+        object.__setattr__(node, '_order', order)
+        object.__setattr__(node, '_hash', hash(node))
+        _INTERNED[key] = node
+    return node
@@ -0,0 +1,125 @@
+import algebra_classes as alg_cl
+import algebra_postfix as alg_post
+
+class EvaluationContext():
+    '''Remembers the value of every subtree of an expression so that changing a binding only recomputes the subtrees depending on it.'''
+
+    def __init__(self, expression: alg_cl._Node, bindings: dict = None, width: int = 64):
+        if not isinstance(expression, alg_cl._Node):
+            raise TypeError('Only Constants, Variables, Operations and Equations can be evaluated, not a '+str(type(expression)))
+        if not isinstance(width, int) or width < 2:
+            raise ValueError('EvaluationContext width must be an int of at least 2, not '+repr(width))
+        self.expression = expression
+        self.width = width
+        #nodes are numbered in post order so every node comes after the nodes it depends on
+        self.children = []
+        self.evaluators = []
+        self.parents = []
+        self.values = []
+        self.leaves = dict()
+        self.indices = dict()
+        self.bindings = dict()
+        self.dirty = set()
+        self.operations = 0
+        self.recomputed = 0
+        self.reused = 0
+        stack = [(expression, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if id(node) in self.indices:
+                continue
+            if isinstance(node, alg_cl.Constant):
+                self.indices[id(node)] = self._add(None, None, node.value)
+            elif isinstance(node, alg_cl.Variable):
+                index = self._add(None, None, None)
+                self.indices[id(node)] = index
+                self.leaves.setdefault(node.name, []).append(index)
+            elif not expanded:
+                stack.append((node, True))
+                children = node.parts if isinstance(node, alg_cl.Operation) else (node.lhs, node.rhs)
+                for child in reversed(children):
+                    stack.append((child, False))
+            else:
+                evaluator = alg_post.EVALUATORS.get(node.python_symbol)
+                if evaluator is None:
+                    raise TypeError('Cannot evaluate a '+str(type(node)))
+                children = node.parts if isinstance(node, alg_cl.Operation) else (node.lhs, node.rhs)
+                indices = [self.indices[id(child)] for child in children]
+                #wide operations are split into groups of at most width parts so a change only recomputes its own groups
+                while len(indices) > width:
+                    indices = [self._add(evaluator, indices[i:i+width], None) for i in range(0, len(indices), width)]
+                self.indices[id(node)] = self._add(evaluator, indices, None)
+        self.root = self.indices[id(expression)]
+        self.unbound = set(self.leaves)
+        if bindings is not None:
+            self.update(bindings)
+        return
+
+    def _add(self, evaluator, children: list, value) -> int:
+        '''Appends a node computed by evaluator from given children indices, or a leaf of given value, returning its index.'''
+        index = len(self.values)
+        self.evaluators.append(evaluator)
+        self.children.append(children)
+        self.parents.append([])
+        self.values.append(value)
+        if children is not None:
+            for child in children:
+                self.parents[child].append(index)
+            self.dirty.add(index)
+            self.operations += 1
+        return index
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def set(self, name: str, value):
+        '''Binds the named variable to given value, or unbinds it when value is None, marking the subtrees depending on it.'''
+        if name not in self.leaves:
+            raise ValueError('Variable '+repr(name)+' is not in the expression')
+        old = self.bindings.get(name)
+        if value is not None and type(old) is type(value) and old == value:
+            return
+        if value is None:
+            self.bindings.pop(name, None)
+            self.unbound.add(name)
+        else:
+            self.bindings[name] = value
+            self.unbound.discard(name)
+        #only the paths from the changed leaves up to the root become dirty
+        stack = []
+        for leaf in self.leaves[name]:
+            self.values[leaf] = value
+            stack.extend(self.parents[leaf])
+        while stack:
+            index = stack.pop()
+            if index not in self.dirty:
+                self.dirty.add(index)
+                stack.extend(self.parents[index])
+        return
+
+    def update(self, bindings: dict):
+        '''Binds each variable of given bindings, such as the vars_dict of identify(), that is in the expression.'''
+        for name in bindings:
+            if name in self.leaves:
+                self.set(name, bindings[name])
+        return
+
+    def evaluate(self):
+        '''Returns the value of the expression, recomputing only the dirty subtrees.'''
+        if self.unbound:
+            raise ValueError('Variable '+repr(min(self.unbound))+' has no value')
+        order = sorted(self.dirty)
+        values = self.values
+        for index in order:
+            values[index] = self.evaluators[index]([values[child] for child in self.children[index]])
+        self.recomputed += len(order)
+        self.reused += self.operations - len(order)
+        self.dirty.clear()
+        return values[self.root]
+
+    def value_of(self, node: alg_cl._Node):
+        '''Returns the value of given subtree of the expression.'''
+        if id(node) not in self.indices:
+            raise ValueError('Node '+str(node)+' is not part of the expression')
+        self.evaluate()
+        return self.values[self.indices[id(node)]]
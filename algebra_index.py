@@ -0,0 +1,102 @@
+import math
+
+import algebra_classes as alg_cl
+import algebra_postfix as alg_post
+
+class EquationIndex():
+    '''Finds the equations equal up to the order of operation parts and the sides of equations in average constant time.'''
+
+    def __init__(self, probabilistic: bool = False, points: int = 4, tolerance: float = 1e-9, seed: int = 0):
+        if points < 1 or tolerance <= 0:
+            raise ValueError('EquationIndex needs at least 1 point and a positive tolerance')
+        self.equations = []
+        self.entries = dict()
+        self.probabilistic = probabilistic
+        self.points = points
+        self.tolerance = tolerance
+        self.seed = seed
+        self.fingerprints = dict()
+        return
+
+    def __len__(self) -> int:
+        return len(self.equations)
+
+    def __contains__(self, equation: alg_cl.Equation) -> bool:
+        return equation in self.entries
+
+    def __getitem__(self, position: int) -> alg_cl.Equation:
+        return self.equations[position]
+
+    def add(self, equation: alg_cl.Equation) -> int:
+        '''Adds given equation to the index, returning its position.'''
+        if not isinstance(equation, alg_cl.Equation):
+            raise TypeError('Only Equations can be indexed, not a '+str(type(equation)))
+        #interned equations cache their hash, and their equality rejects most other interned equations by hash alone
+        equation = alg_cl.intern(equation)
+        position = len(self.equations)
+        self.equations.append(equation)
+        self.entries.setdefault(equation, []).append(position)
+        if self.probabilistic:
+            key = fingerprint(equation, self.points, self.tolerance, self.seed)
+            if key is not None:
+                self.fingerprints.setdefault(key, []).append(position)
+        return position
+
+    def find(self, equation: alg_cl.Equation) -> list:
+        '''Returns the positions of the indexed equations structurally equal to given equation.'''
+        return list(self.entries.get(equation, ()))
+
+    def equivalent(self, equation: alg_cl.Equation) -> list:
+        '''Returns the positions of the indexed equations that probably have the same solutions as given equation.'''
+        if not self.probabilistic:
+            raise ValueError('EquationIndex was not created with probabilistic=True')
+        key = fingerprint(equation, self.points, self.tolerance, self.seed)
+        if key is None:
+            return self.find(equation)
+        return list(self.fingerprints.get(key, ()))
+
+    def groups(self) -> list:
+        '''Returns the positions of each set of structurally equal equations that has more than one member.'''
+        return [positions for positions in self.entries.values() if len(positions) > 1]
+
+def _values(name: str, points: int, seed: int) -> list:
+    '''Returns the random values of the named variable at each point, the same for every equation.'''
+    import random
+    rng = random.Random(str(seed)+':'+name)
+    return [rng.uniform(-2.0, 2.0) for i in range(points)]
+
+def residuals(equation: alg_cl.Equation, points: int = 4, seed: int = 0) -> list:
+    '''Returns lhs - rhs of given equation evaluated in floats at each of points random points.'''
+    flat = alg_post.residual(equation)
+    columns = {name : _values(name, points, seed) for name in flat.names}
+    return [flat.evaluate({name : columns[name][i] for name in columns}) for i in range(points)]
+
+def fingerprint(equation: alg_cl.Equation, points: int = 4, tolerance: float = 1e-9, seed: int = 0) -> tuple:
+    '''Returns a key shared by equations whose residuals are proportional at random points, or None if they overflow.'''
+    if isinstance(equation, (alg_cl.Lesser, alg_cl.LesserEqual)):
+        #lesser equations are the converse greater equations with the residual negated
+        kind = alg_cl.Greater if isinstance(equation, alg_cl.Lesser) else alg_cl.GreaterEqual
+        values = [-value for value in residuals(equation, points, seed)]
+    else:
+        kind = type(equation)
+        values = residuals(equation, points, seed)
+    if not all(math.isfinite(value) for value in values):
+        return None
+    #residuals are scaled by their largest value, keeping the sign of inequalities
+    scale = max(values, key=abs)
+    if scale == 0:
+        return (kind, (0.0,) * points)
+    if issubclass(kind, (alg_cl.Greater, alg_cl.GreaterEqual)):
+        scale = abs(scale)
+    digits = max(0, round(-math.log10(tolerance)))
+    return (kind, tuple(round(value / scale, digits) + 0.0 for value in values))
+
+def probably_equivalent(a: alg_cl.Equation, b: alg_cl.Equation, points: int = 8, tolerance: float = 1e-9, seed: int = 0) -> bool:
+    '''Whether given equations probably have the same solutions, judged by comparing their scaled residuals at random points.'''
+    if a == b:
+        return True
+    key_a = fingerprint(a, points, tolerance, seed)
+    key_b = fingerprint(b, points, tolerance, seed)
+    if key_a is None or key_b is None or key_a[0] != key_b[0]:
+        return False
+    return all(abs(x - y) <= tolerance * 10 for x, y in zip(key_a[1], key_b[1]))
@@ -0,0 +1,185 @@
+import bisect
+import math
+
+import algebra_classes as alg_cl
+import algebra_linear as alg_lin
+
+class IntervalSet():
+    '''A union of disjoint intervals of the real numbers, kept sorted so membership is a binary search.'''
+
+    def __init__(self, intervals: list = ()):
+        #intervals are (low, high, low_closed, high_closed) tuples that are sorted, cleaned and merged here
+        self.lows = []
+        self.highs = []
+        self.low_closed = []
+        self.high_closed = []
+        for low, high, low_closed, high_closed in sorted(intervals, key=lambda interval: (interval[0], not interval[2])):
+            low_closed = bool(low_closed) and low != -math.inf
+            high_closed = bool(high_closed) and high != math.inf
+            if low > high or (low == high and not (low_closed and high_closed)):
+                continue
+            if self.highs and (low < self.highs[-1] or (low == self.highs[-1] and (low_closed or self.high_closed[-1]))):
+                #overlapping or touching intervals are merged
+                if high > self.highs[-1] or (high == self.highs[-1] and high_closed):
+                    self.highs[-1] = high
+                    self.high_closed[-1] = high_closed
+                continue
+            self.lows.append(low)
+            self.highs.append(high)
+            self.low_closed.append(low_closed)
+            self.high_closed.append(high_closed)
+        return
+
+    def everything() -> 'IntervalSet':
+        '''Returns the set of all real numbers.'''
+        return IntervalSet([(-math.inf, math.inf, False, False)])
+
+    def point(value: float) -> 'IntervalSet':
+        '''Returns the set of only the given value.'''
+        return IntervalSet([(value, value, True, True)])
+
+    def above(value: float, closed: bool) -> 'IntervalSet':
+        '''Returns the set of numbers greater than, or when closed also equal to, the given value.'''
+        return IntervalSet([(value, math.inf, closed, False)])
+
+    def below(value: float, closed: bool) -> 'IntervalSet':
+        '''Returns the set of numbers lesser than, or when closed also equal to, the given value.'''
+        return IntervalSet([(-math.inf, value, False, closed)])
+
+    def intervals(self) -> list:
+        '''Returns the (low, high, low_closed, high_closed) tuples of this set in order.'''
+        return list(zip(self.lows, self.highs, self.low_closed, self.high_closed))
+
+    def __repr__(self) -> str:
+        return 'IntervalSet('+repr(self.intervals())+')'
+
+    def __str__(self) -> str:
+        if not self.lows:
+            return '{}'
+        strings = []
+        for low, high, low_closed, high_closed in self.intervals():
+            if low == high:
+                strings.append('{'+str(low)+'}')
+            else:
+                strings.append(('[' if low_closed else '(')+str(low)+', '+str(high)+(']' if high_closed else ')'))
+        return ' U '.join(strings)
+
+    def __eq__(self, other: 'IntervalSet') -> bool:
+        if not isinstance(other, IntervalSet):
+            return False
+        return self.intervals() == other.intervals()
+
+    def __len__(self) -> int:
+        return len(self.lows)
+
+    def __contains__(self, value: float) -> bool:
+        i = bisect.bisect_right(self.lows, value) - 1
+        if i < 0:
+            return False
+        if value == self.lows[i] and not self.low_closed[i]:
+            return False
+        return value < self.highs[i] or (value == self.highs[i] and self.high_closed[i])
+
+    def mask(self, values) -> list:
+        '''Returns whether each of given values is in this set, as a boolean array when given a NumPy array.'''
+        if type(values).__module__ == 'numpy':
+            import numpy
+            if not self.lows:
+                return numpy.zeros(numpy.shape(values), dtype=bool)
+            lows = numpy.array(self.lows, dtype=float)
+            highs = numpy.array(self.highs, dtype=float)
+            low_closed = numpy.array(self.low_closed, dtype=bool)
+            high_closed = numpy.array(self.high_closed, dtype=bool)
+            i = numpy.searchsorted(lows, values, side='right') - 1
+            inside = i >= 0
+            i = numpy.maximum(i, 0)
+            inside &= (values > lows[i]) | ((values == lows[i]) & low_closed[i])
+            inside &= (values < highs[i]) | ((values == highs[i]) & high_closed[i])
+            return inside
+        return [value in self for value in values]
+
+    def complement(self) -> 'IntervalSet':
+        '''Returns the set of numbers not in this set.'''
+        intervals = []
+        low = -math.inf
+        low_closed = False
+        for interval in self.intervals():
+            intervals.append((low, interval[0], low_closed, not interval[2]))
+            low = interval[1]
+            low_closed = not interval[3]
+        intervals.append((low, math.inf, low_closed, False))
+        return IntervalSet(intervals)
+
+    def union(self, other: 'IntervalSet') -> 'IntervalSet':
+        '''Returns the set of numbers in either this or the other set.'''
+        return IntervalSet(self.intervals() + other.intervals())
+
+    def intersection(self, other: 'IntervalSet') -> 'IntervalSet':
+        '''Returns the set of numbers in both this and the other set.'''
+        #both sets are sorted so their intervals are walked together once
+        intervals = []
+        mine = self.intervals()
+        theirs = other.intervals()
+        i = 0
+        j = 0
+        while i < len(mine) and j < len(theirs):
+            a = mine[i]
+            b = theirs[j]
+            if a[0] > b[0] or (a[0] == b[0] and not a[2]):
+                low, low_closed = a[0], a[2]
+            else:
+                low, low_closed = b[0], b[2]
+            if a[1] < b[1] or (a[1] == b[1] and not a[3]):
+                high, high_closed = a[1], a[3]
+                i += 1
+            else:
+                high, high_closed = b[1], b[3]
+                j += 1
+            intervals.append((low, high, low_closed, high_closed))
+        return IntervalSet(intervals)
+
+    __or__ = union
+    __and__ = intersection
+    __invert__ = complement
+
+def solve_inequality(equation: alg_cl.Equation) -> tuple:
+    '''Returns the name of the single variable of given linear equation and the IntervalSet of its solutions.'''
+    if type(equation) not in (alg_cl.Equal, alg_cl.NotEqual, alg_cl.Greater, alg_cl.Lesser, alg_cl.GreaterEqual, alg_cl.LesserEqual):
+        raise TypeError('Only Equal, NotEqual, Greater, Lesser, GreaterEqual and LesserEqual equations can be solved, not a '+str(type(equation)))
+    #the equation becomes a * x + b compared to zero
+    form = alg_lin.linear_form(equation.lhs)
+    for key, value in alg_lin.linear_form(equation.rhs).items():
+        form[key] = form[key] - value if key in form else -value
+    b = form.pop(None, 0)
+    names = [key for key in form if form[key] != 0]
+    if len(names) > 1:
+        raise ValueError('Inequalities can only be solved for a single variable, not '+', '.join(names))
+    name = names[0] if names else next(iter(form), None)
+    a = form.get(name, 0)
+    if isinstance(equation, (alg_cl.Lesser, alg_cl.LesserEqual)):
+        a, b = -a, -b
+    closed = isinstance(equation, (alg_cl.GreaterEqual, alg_cl.LesserEqual, alg_cl.Equal))
+    if a == 0:
+        if isinstance(equation, alg_cl.Equal):
+            holds = b == 0
+        elif isinstance(equation, alg_cl.NotEqual):
+            holds = b != 0
+        else:
+            holds = b > 0 or (closed and b == 0)
+        return (name, IntervalSet.everything() if holds else IntervalSet())
+    root = alg_cl.divide(-b, a)
+    if isinstance(equation, alg_cl.Equal):
+        return (name, IntervalSet.point(root))
+    if isinstance(equation, alg_cl.NotEqual):
+        return (name, IntervalSet.point(root).complement())
+    if a > 0:
+        return (name, IntervalSet.above(root, closed))
+    return (name, IntervalSet.below(root, closed))
+
+def solve_inequalities(equations: list) -> dict:
+    '''Returns the IntervalSet satisfying all of given single variable equations for each variable.'''
+    solutions = dict()
+    for equation in equations:
+        name, solution = solve_inequality(equation)
+        solutions[name] = solutions[name] & solution if name in solutions else solution
+    return solutions
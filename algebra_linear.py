@@ -0,0 +1,127 @@
+import heapq
+
+import algebra_classes as alg_cl
+
+def linear_form(expression: (alg_cl.Operation, alg_cl.Variable, alg_cl.Constant)) -> dict:
+    '''Returns the coefficients of given linear expression keyed by variable name, with its constant term keyed by None.'''
+    #the forms of the parts are combined in post order on an explicit stack so deeply nested expressions do not hit the recursion limit
+    forms = dict()
+    stack = [expression]
+    while stack:
+        node = stack[-1]
+        if id(node) in forms:
+            stack.pop()
+            continue
+        if isinstance(node, (alg_cl.Sum, alg_cl.Product)):
+            pending = [part for part in node.parts if id(part) not in forms]
+            if pending:
+                stack.extend(pending)
+                continue
+        stack.pop()
+        forms[id(node)] = _combine_forms(node, forms)
+    return forms[id(expression)]
+
+def _combine_forms(expression: (alg_cl.Operation, alg_cl.Variable, alg_cl.Constant), forms: dict) -> dict:
+    '''Returns the linear form of given expression from the forms of its parts in given dict keyed by their ids.'''
+    if isinstance(expression, alg_cl.Constant):
+        return {None : expression.value}
+    if isinstance(expression, alg_cl.Variable):
+        return {expression.name : 1}
+    if isinstance(expression, alg_cl.Sum):
+        form = dict()
+        for part in expression.parts:
+            for key, value in forms[id(part)].items():
+                form[key] = form[key] + value if key in form else value
+        return form
+    if isinstance(expression, alg_cl.Product):
+        #at most one factor may contain variables, the others scale it
+        form = {None : 1}
+        for part in expression.parts:
+            factor = forms[id(part)]
+            if len(factor) > 1 or None not in factor:
+                if len(form) > 1 or None not in form:
+                    raise ValueError('Nonlinear expression '+str(expression))
+                form, factor = factor, form
+            scale = factor.get(None, 0)
+            form = {key : value * scale for key, value in form.items()}
+        return form
+    raise TypeError('Only Sums, Products, Variables and Constants have linear forms, not a '+str(type(expression)))
+
+def is_linear(equation: alg_cl.Equation) -> bool:
+    '''Whether both sides of given equation are linear.'''
+    try:
+        linear_form(equation.lhs)
+        linear_form(equation.rhs)
+    except ValueError:
+        return False
+    return True
+
+def solve_system(equations: list, tolerance: float = 1e-12) -> dict:
+    '''Solves given linear Equal equations by sparse Gaussian elimination, returning the value of each determined variable.'''
+    rows = []
+    rhs = []
+    columns = dict()
+    for equation in equations:
+        if not isinstance(equation, alg_cl.Equal):
+            raise TypeError('Only Equal equations can be solved as a linear system, not a '+str(type(equation)))
+        #each equation becomes the row of lhs - rhs = 0
+        row = linear_form(equation.lhs)
+        for key, value in linear_form(equation.rhs).items():
+            row[key] = row[key] - value if key in row else -value
+        constant = row.pop(None, 0)
+        for key in [key for key in row if abs(row[key]) <= tolerance]:
+            del row[key]
+        for key in row:
+            columns.setdefault(key, set()).add(len(rows))
+        rows.append(row)
+        rhs.append(-constant)
+    #rows are eliminated sparsest first to keep fill in low
+    heap = [(len(row), i) for i, row in enumerate(rows)]
+    heapq.heapify(heap)
+    remaining = set(range(len(rows)))
+    order = []
+    while heap:
+        size, i = heapq.heappop(heap)
+        if i not in remaining:
+            continue
+        row = rows[i]
+        if size != len(row):
+            heapq.heappush(heap, (len(row), i))
+            continue
+        remaining.discard(i)
+        if not row:
+            if abs(rhs[i]) / max(1, abs(rhs[i])) > tolerance:
+                raise ValueError('Impossible equation')
+            continue
+        pivot = max(row, key=lambda key: abs(row[key]))
+        order.append((pivot, i))
+        for j in list(columns[pivot]):
+            if j == i or j not in remaining:
+                continue
+            other = rows[j]
+            ratio = alg_cl.divide(other[pivot], row[pivot])
+            for key, value in row.items():
+                updated = other.get(key, 0) - ratio * value
+                if key == pivot or abs(updated) <= tolerance:
+                    if key in other:
+                        del other[key]
+                        columns[key].discard(j)
+                else:
+                    if key not in other:
+                        columns[key].add(j)
+                    other[key] = updated
+            rhs[j] -= ratio * rhs[i]
+    #back substitution leaves variables depending on free variables undetermined
+    values = dict()
+    for pivot, i in reversed(order):
+        row = rows[i]
+        total = rhs[i]
+        for key, value in row.items():
+            if key == pivot:
+                continue
+            if key not in values:
+                break
+            total -= value * values[key]
+        else:
+            values[pivot] = alg_cl.divide(total, row[pivot])
+    return values
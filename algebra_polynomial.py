@@ -0,0 +1,162 @@
+import algebra_classes as alg_cl
+
+class Polynomial():
+    '''A sparse polynomial mapping tuples of variable exponents to their coefficients.'''
+
+    __slots__ = ('variables', 'terms')
+
+    def __init__(self, variables: tuple = (), terms: dict = None):
+        #variables are kept sorted and only while some term uses them, and zero terms are dropped
+        variables = tuple(variables)
+        terms = dict() if terms is None else terms
+        for exponents in terms:
+            if len(exponents) != len(variables):
+                raise ValueError('Every term must have one exponent for each of the '+str(len(variables))+' variables, not '+repr(exponents))
+        used = set()
+        for exponents, coefficient in terms.items():
+            if coefficient != 0:
+                used.update(i for i, exponent in enumerate(exponents) if exponent)
+        order = sorted(used, key=lambda i: variables[i])
+        self.variables = tuple(variables[i] for i in order)
+        self.terms = dict()
+        for exponents, coefficient in terms.items():
+            if coefficient != 0:
+                key = tuple(exponents[i] for i in order)
+                self.terms[key] = self.terms[key] + coefficient if key in self.terms else coefficient
+        for key in [key for key in self.terms if self.terms[key] == 0]:
+            del self.terms[key]
+        return
+
+    def constant(value) -> 'Polynomial':
+        '''Returns the polynomial of only the given constant.'''
+        return Polynomial((), {() : value})
+
+    def variable(name: str) -> 'Polynomial':
+        '''Returns the polynomial of only the given variable.'''
+        return Polynomial((name,), {(1,) : 1})
+
+    def from_tree(expression: (alg_cl.Operation, alg_cl.Variable, alg_cl.Constant)) -> 'Polynomial':
+        '''Converts given Sum, Product, Variable or Constant tree into a Polynomial.'''
+        if isinstance(expression, alg_cl.Constant):
+            return Polynomial.constant(expression.value)
+        if isinstance(expression, alg_cl.Variable):
+            return Polynomial.variable(expression.name)
+        if isinstance(expression, alg_cl.Sum):
+            #the terms of every part are added into one dict aligned to the variables of all the parts at once
+            parts = [Polynomial.from_tree(part) for part in expression.parts]
+            variables = tuple(sorted(set(name for part in parts for name in part.variables)))
+            positions = {name : i for i, name in enumerate(variables)}
+            terms = dict()
+            for part in parts:
+                indices = [positions[name] for name in part.variables]
+                for exponents, coefficient in part.terms.items():
+                    key = [0] * len(variables)
+                    for index, exponent in zip(indices, exponents):
+                        key[index] = exponent
+                    key = tuple(key)
+                    terms[key] = terms[key] + coefficient if key in terms else coefficient
+            return Polynomial(variables, terms)
+        if isinstance(expression, alg_cl.Product):
+            #factors are multiplied in balanced pairs so intermediate products stay small
+            factors = [Polynomial.from_tree(part) for part in expression.parts]
+            while len(factors) > 1:
+                paired = [factors[i] * factors[i+1] for i in range(0, len(factors) - 1, 2)]
+                if len(factors) % 2:
+                    paired.append(factors[-1])
+                factors = paired
+            return factors[0]
+        raise TypeError('Only Sums, Products, Variables and Constants can be converted to Polynomials, not a '+str(type(expression)))
+
+    def to_tree(self) -> (alg_cl.Operation, alg_cl.Variable, alg_cl.Constant):
+        '''Converts this polynomial into a Sum of Products, with powers written as repeated factors.'''
+        parts = []
+        #terms are written from the highest degree down
+        for exponents in sorted(self.terms, key=lambda exponents: (-sum(exponents), tuple(-exponent for exponent in exponents))):
+            coefficient = self.terms[exponents]
+            factors = []
+            if coefficient != 1 or not any(exponents):
+                factors.append(alg_cl.Constant(coefficient))
+            for name, exponent in zip(self.variables, exponents):
+                for i in range(exponent):
+                    factors.append(alg_cl.Variable(name))
+            parts.append(factors[0] if len(factors) == 1 else alg_cl.Product(*factors))
+        if not parts:
+            return alg_cl.Constant(0)
+        if len(parts) == 1:
+            return parts[0]
+        return alg_cl.Sum(*parts)
+
+    def aligned(self, variables: tuple) -> dict:
+        '''Returns the terms of this polynomial with exponents for each of the given sorted variables.'''
+        if variables == self.variables:
+            return self.terms
+        positions = [variables.index(name) for name in self.variables]
+        terms = dict()
+        for exponents, coefficient in self.terms.items():
+            key = [0] * len(variables)
+            for position, exponent in zip(positions, exponents):
+                key[position] = exponent
+            terms[tuple(key)] = coefficient
+        return terms
+
+    def __repr__(self) -> str:
+        return 'Polynomial('+repr(self.variables)+','+repr(self.terms)+')'
+
+    def __str__(self) -> str:
+        return str(self.to_tree())
+
+    def __eq__(self, other: 'Polynomial') -> bool:
+        if not isinstance(other, Polynomial):
+            return False
+        return self.variables == other.variables and self.terms == other.terms
+
+    def __hash__(self) -> int:
+        return hash((self.variables, frozenset(self.terms.items())))
+
+    def __add__(self, other: 'Polynomial') -> 'Polynomial':
+        variables = tuple(sorted(set(self.variables) | set(other.variables)))
+        terms = dict(self.aligned(variables))
+        for exponents, coefficient in other.aligned(variables).items():
+            terms[exponents] = terms[exponents] + coefficient if exponents in terms else coefficient
+        return Polynomial(variables, terms)
+
+    def __neg__(self) -> 'Polynomial':
+        return Polynomial(self.variables, {exponents : -coefficient for exponents, coefficient in self.terms.items()})
+
+    def __sub__(self, other: 'Polynomial') -> 'Polynomial':
+        return self + -other
+
+    def __mul__(self, other: 'Polynomial') -> 'Polynomial':
+        variables = tuple(sorted(set(self.variables) | set(other.variables)))
+        mine = self.aligned(variables)
+        theirs = other.aligned(variables)
+        #like terms are combined as they are produced so only distinct monomials are stored
+        terms = dict()
+        for exponents, coefficient in mine.items():
+            for other_exponents, other_coefficient in theirs.items():
+                key = tuple([a + b for a, b in zip(exponents, other_exponents)])
+                value = coefficient * other_coefficient
+                terms[key] = terms[key] + value if key in terms else value
+        return Polynomial(variables, terms)
+
+    def __pow__(self, exponent: int) -> 'Polynomial':
+        if not isinstance(exponent, int) or exponent < 0:
+            raise ValueError('Polynomials can only be raised to non-negative int powers, not '+repr(exponent))
+        result = Polynomial.constant(1)
+        base = self
+        while exponent:
+            if exponent & 1:
+                result = result * base
+            base = base * base
+            exponent >>= 1
+        return result
+
+    def degree(self) -> int:
+        '''Returns the highest total degree of the terms of this polynomial.'''
+        return max((sum(exponents) for exponents in self.terms), default=0)
+
+def expand(expression: (alg_cl.Equation, alg_cl.Operation, alg_cl.Variable, alg_cl.Constant)) -> (alg_cl.Equation, alg_cl.Operation, alg_cl.Variable, alg_cl.Constant):
+    '''Returns the canonical expanded form of given expression, expanding both sides of an equation.'''
+    if isinstance(expression, alg_cl.Equation):
+        return type(expression)(expand(expression.lhs), expand(expression.rhs))
+    return Polynomial.from_tree(expression).to_tree()
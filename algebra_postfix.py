@@ -0,0 +1,283 @@
+import array
+import math
+import numbers
+import operator
+import struct
+
+import algebra_classes as alg_cl
+
+class PostfixExpression():
+    '''A flat postfix encoding of an expression tree, with one opcode and one operand per node.'''
+
+    __slots__ = ('opcodes', 'operands', 'constants', 'names')
+
+    def __init__(self, opcodes: array.array = None, operands: array.array = None, constants: list = None, names: list = None):
+        #the operand of a constant or variable indexes its pool, and the operand of an operation or equation counts its parts
+        self.opcodes = array.array('B') if opcodes is None else opcodes
+        self.operands = array.array('I') if operands is None else operands
+        self.constants = list() if constants is None else constants
+        self.names = list() if names is None else names
+        if len(self.opcodes) != len(self.operands):
+            raise ValueError('Every opcode must have an operand, not '+str(len(self.opcodes))+' opcodes and '+str(len(self.operands))+' operands')
+        return
+
+    def __len__(self) -> int:
+        return len(self.opcodes)
+
+    def __repr__(self) -> str:
+        return 'PostfixExpression('+str(len(self))+' nodes, '+str(len(self.constants))+' constants, '+str(len(self.names))+' variables)'
+
+    def from_tree(expression: (alg_cl.Equation, alg_cl.Operation, alg_cl.Variable, alg_cl.Constant)) -> 'PostfixExpression':
+        '''Encodes given expression tree, sharing one pool entry between equal constants and between equal variables.'''
+        global OPCODES
+        flat = PostfixExpression()
+        constant_indices = dict()
+        name_indices = dict()
+        #iterative post-order walk so deep trees do not hit the recursion limit
+        stack = [(expression, False)]
+        while stack:
+            node, expanded = stack.pop()
+            opcode = OPCODES.get(type(node))
+            if opcode is None:
+                raise TypeError('Only registered node types can be encoded in postfix, not a '+str(type(node)))
+            if isinstance(node, alg_cl.Constant):
+                #constants are pooled by type as well as value so 2 and 2.0 both survive the round trip
+                key = (type(node.value), node.value)
+                if key not in constant_indices:
+                    constant_indices[key] = len(flat.constants)
+                    flat.constants.append(node.value)
+                operand = constant_indices[key]
+            elif isinstance(node, alg_cl.Variable):
+                if node.name not in name_indices:
+                    name_indices[node.name] = len(flat.names)
+                    flat.names.append(node.name)
+                operand = name_indices[node.name]
+            elif not expanded:
+                stack.append((node, True))
+                children = node.parts if isinstance(node, alg_cl.Operation) else (node.lhs, node.rhs)
+                for child in reversed(children):
+                    stack.append((child, False))
+                continue
+            else:
+                operand = len(node.parts) if isinstance(node, alg_cl.Operation) else 2
+            flat.opcodes.append(opcode)
+            flat.operands.append(operand)
+        return flat
+
+    def to_tree(self) -> (alg_cl.Equation, alg_cl.Operation, alg_cl.Variable, alg_cl.Constant):
+        '''Decodes this expression back into Constant, Variable, Operation and Equation nodes.'''
+        global NODE_TYPES
+        stack = []
+        for opcode, operand in zip(self.opcodes, self.operands):
+            if opcode == CONSTANT:
+                stack.append(alg_cl.Constant(self.constants[operand]))
+            elif opcode == VARIABLE:
+                stack.append(alg_cl.Variable(self.names[operand]))
+            else:
+                parts = stack[len(stack)-operand:]
+                del stack[len(stack)-operand:]
+                stack.append(NODE_TYPES[opcode](*parts))
+        if len(stack) != 1:
+            raise ValueError('Malformed postfix expression leaves '+str(len(stack))+' values')
+        return stack[0]
+
+    def evaluate(self, values: dict):
+        '''Evaluates this expression with given values keyed by variable name, returning a number or a bool for equations.'''
+        global NODE_TYPES, EVALUATORS
+        arguments = []
+        for name in self.names:
+            if name not in values:
+                raise ValueError('Variable '+repr(name)+' has no value')
+            arguments.append(values[name])
+        evaluators = [EVALUATORS.get(node_type.python_symbol) if opcode > VARIABLE else None for opcode, node_type in enumerate(NODE_TYPES)]
+        constants = self.constants
+        stack = []
+        for opcode, operand in zip(self.opcodes, self.operands):
+            if opcode == CONSTANT:
+                stack.append(constants[operand])
+            elif opcode == VARIABLE:
+                stack.append(arguments[operand])
+            else:
+                parts = stack[len(stack)-operand:]
+                del stack[len(stack)-operand:]
+                stack.append(evaluators[opcode](parts))
+        return stack[0]
+
+    def canonical(self, table: dict) -> int:
+        '''Returns the id of the root of this expression in given table, which is shared by structurally equal subtrees.'''
+        global NODE_TYPES, OPCODES, CONVERSES
+        stack = []
+        for opcode, operand in zip(self.opcodes, self.operands):
+            if opcode == CONSTANT:
+                key = (opcode, self.constants[operand])
+            elif opcode == VARIABLE:
+                key = (opcode, self.names[operand])
+            else:
+                children = stack[len(stack)-operand:]
+                del stack[len(stack)-operand:]
+                #the parts of an operation and the sides of a symmetric equation are unordered, and other equations are written as the converse they share
+                node_type = NODE_TYPES[opcode]
+                if issubclass(node_type, alg_cl.Operation) or node_type.symbol == node_type.converse_symbol:
+                    children.sort()
+                elif node_type in CONVERSES:
+                    opcode = OPCODES[CONVERSES[node_type]]
+                    children.reverse()
+                key = (opcode, tuple(children))
+            stack.append(table.setdefault(key, len(table)))
+        return stack[0]
+
+    def __eq__(self, other: 'PostfixExpression') -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, PostfixExpression):
+            return False
+        if len(self) != len(other):
+            return False
+        table = dict()
+        return self.canonical(table) == other.canonical(table)
+
+    def __hash__(self) -> int:
+        #the hash is built the same way as the hash of the tree, so it also ignores the order of the parts
+        global NODE_TYPES
+        stack = []
+        for opcode, operand in zip(self.opcodes, self.operands):
+            if opcode == CONSTANT:
+                stack.append(hash(self.constants[operand]))
+            elif opcode == VARIABLE:
+                stack.append(hash(self.names[operand]))
+            else:
+                node_type = NODE_TYPES[opcode]
+                total = 0
+                for i in range(len(stack)-operand, len(stack)):
+                    total += hash((alg_cl._Hash(stack[i]),))
+                del stack[len(stack)-operand:]
+                if issubclass(node_type, alg_cl.Operation):
+                    stack.append(hash((node_type, operand, total)))
+                else:
+                    stack.append(hash((frozenset((node_type.symbol, node_type.converse_symbol)), total)))
+        return stack[0]
+
+    def to_bytes(self) -> bytes:
+        '''Serializes this expression with a versioned little endian header.'''
+        global MAGIC, VERSION
+        if _NATIVE:
+            operands = self.operands.tobytes()
+        else:
+            operands = struct.pack('<'+str(len(self))+'I', *self.operands)
+        pieces = [struct.pack('<4sBIII', MAGIC, VERSION, len(self), len(self.constants), len(self.names)), self.opcodes.tobytes(), operands]
+        for value in self.constants:
+            tag, text = _encode_number(value)
+            data = text.encode('ascii')
+            pieces.append(struct.pack('<cI', tag, len(data)))
+            pieces.append(data)
+        for name in self.names:
+            data = name.encode('utf-8')
+            pieces.append(struct.pack('<I', len(data)))
+            pieces.append(data)
+        return b''.join(pieces)
+
+    def from_bytes(data: bytes) -> 'PostfixExpression':
+        '''Deserializes an expression written by to_bytes().'''
+        flat, end = PostfixExpression.decode(data)
+        if end != len(data):
+            raise ValueError('Trailing data after postfix expression at byte '+str(end))
+        return flat
+
+    def decode(data: bytes, offset: int = 0) -> tuple:
+        '''Deserializes the expression starting at offset of given bytes-like data, returning it and the offset after it.'''
+        global MAGIC, VERSION
+        view = memoryview(data)
+        header = struct.Struct('<4sBIII')
+        if len(view) < offset + header.size:
+            raise ValueError('Truncated postfix expression header')
+        magic, version, count, constant_count, name_count = header.unpack_from(view, offset)
+        if magic != MAGIC:
+            raise ValueError('Not a postfix expression, bad magic number '+repr(magic))
+        if version != VERSION:
+            raise ValueError('Unsupported postfix expression version '+str(version))
+        offset += header.size
+        if len(view) < offset + 5 * count:
+            raise ValueError('Truncated postfix expression nodes')
+        opcodes = array.array('B', view[offset:offset+count])
+        offset += count
+        if _NATIVE:
+            operands = array.array('I')
+            operands.frombytes(view[offset:offset+4*count])
+        else:
+            operands = array.array('I', struct.unpack_from('<'+str(count)+'I', view, offset))
+        offset += 4 * count
+        constants = []
+        names = []
+        try:
+            for i in range(constant_count):
+                tag, length = struct.unpack_from('<cI', view, offset)
+                offset += 5
+                constants.append(_decode_number(tag, bytes(view[offset:offset+length]).decode('ascii')))
+                offset += length
+            for i in range(name_count):
+                length = struct.unpack_from('<I', view, offset)[0]
+                offset += 4
+                names.append(bytes(view[offset:offset+length]).decode('utf-8'))
+                offset += length
+        except struct.error:
+            raise ValueError('Truncated postfix expression pools')
+        if offset > len(view):
+            raise ValueError('Truncated postfix expression pools')
+        return (PostfixExpression(opcodes, operands, constants, names), offset)
+
+def residual(equation: alg_cl.Equation) -> PostfixExpression:
+    '''Encodes lhs - rhs of given equation with its constants converted to floats.'''
+    flat = PostfixExpression.from_tree(alg_cl.Sum(equation.lhs, alg_cl.Product(alg_cl.Constant(-1), equation.rhs)))
+    flat.constants = [float(value) for value in flat.constants]
+    return flat
+
+def _encode_number(value) -> tuple:
+    '''Returns the type tag and exact text of given constant value.'''
+    import decimal
+    if isinstance(value, int):
+        return (b'i', str(int(value)))
+    if isinstance(value, float):
+        return (b'f', value.hex())
+    if isinstance(value, numbers.Rational):
+        return (b'q', str(value.numerator)+'/'+str(value.denominator))
+    if isinstance(value, decimal.Decimal):
+        return (b'd', str(value))
+    raise TypeError('Only int, float, Fraction and Decimal constants can be serialized, not a '+str(type(value)))
+
+def _decode_number(tag: bytes, text: str):
+    '''Returns the constant value of given type tag and text.'''
+    if tag == b'i':
+        return int(text)
+    if tag == b'f':
+        return float.fromhex(text)
+    if tag == b'q':
+        import fractions
+        return fractions.Fraction(text)
+    if tag == b'd':
+        import decimal
+        return decimal.Decimal(text)
+    raise ValueError('Unknown constant type tag '+repr(tag))
+
+def _compare(function):
+    '''Returns an evaluator applying given comparison to the two sides of an equation.'''
+    return lambda parts: function(parts[0], parts[1])
+
+CONSTANT = 0
+VARIABLE = 1
+NODE_TYPES = [alg_cl.Constant, alg_cl.Variable, alg_cl.Sum, alg_cl.Product,
+              alg_cl.Equal, alg_cl.NotEqual, alg_cl.Greater, alg_cl.Lesser, alg_cl.GreaterEqual, alg_cl.LesserEqual]
+OPCODES = {node_type : opcode for opcode, node_type in enumerate(NODE_TYPES)}
+CONVERSES = {alg_cl.Lesser : alg_cl.Greater,
+             alg_cl.LesserEqual : alg_cl.GreaterEqual}
+EVALUATORS = {'+' : sum,
+              '*' : math.prod,
+              '==' : _compare(operator.eq),
+              '!=' : _compare(operator.ne),
+              '>' : _compare(operator.gt),
+              '<' : _compare(operator.lt),
+              '>=' : _compare(operator.ge),
+              '<=' : _compare(operator.le)}
+#operands are stored little endian, so they are copied as is when the native layout matches
+_NATIVE = array.array('I').itemsize == 4 and struct.pack('=I', 1) == struct.pack('<I', 1)
+MAGIC = b'ALGP'
+VERSION = 1
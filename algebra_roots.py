@@ -0,0 +1,99 @@
+import math
+
+import algebra_classes as alg_cl
+import algebra_postfix as alg_post
+
+def _names(expression: alg_cl._Node) -> list:
+    '''Returns the distinct variable names of given expression in order of appearance.'''
+    names = []
+    seen = set()
+    stack = [expression]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        if isinstance(node, alg_cl.Variable):
+            if node.name not in names:
+                names.append(node.name)
+        elif isinstance(node, alg_cl.Operation):
+            stack.extend(reversed(node.parts))
+        elif isinstance(node, alg_cl.Equation):
+            stack.extend((node.rhs, node.lhs))
+    return names
+
+def find_roots(equation: alg_cl.Equal, low: float = -1000.0, high: float = 1000.0, starts: int = 10001, tolerance: float = 1e-12, iterations: int = 100) -> list:
+    '''Returns the sorted distinct real roots of given single variable Equal equation found by Newton iterations from starts points spread over low to high.'''
+    try:
+        import numpy
+    except ImportError:
+        raise ValueError('Nonlinear equations can only be solved when numpy is installed')
+    if not isinstance(equation, alg_cl.Equal):
+        raise TypeError('Only Equal equations have roots, not a '+str(type(equation)))
+    if not low < high or starts < 2 or iterations < 1 or tolerance <= 0:
+        raise ValueError('Roots need low < high, at least 2 starts, at least 1 iteration and a positive tolerance')
+    #the residual lhs - rhs is evaluated in floats whatever the numeric backend of its constants
+    residual = alg_post.residual(equation).to_tree()
+    names = _names(residual)
+    if len(names) != 1:
+        raise ValueError('Only equations of a single variable can be solved numerically, not of '+str(len(names)))
+    name = names[0]
+    compiled = residual.compile([name])
+    compiled_derivative = residual.diff(name).compile([name])
+    def function(x):
+        return numpy.broadcast_to(numpy.asarray(compiled(x), dtype=float), x.shape)
+    def derivative(x):
+        return numpy.broadcast_to(numpy.asarray(compiled_derivative(x), dtype=float), x.shape)
+    grid = numpy.linspace(low, high, starts)
+    candidates = []
+    with numpy.errstate(all='ignore'):
+        values = function(grid)
+        #a residual that is zero everywhere would make every start a root
+        if residual.simplify() == alg_cl.Constant(0) or not (values.any() or derivative(grid).any()):
+            raise ValueError('Every real number is a root of '+str(equation))
+        candidates.append(grid[values == 0])
+        #each sign change brackets a root that Newton steps refine, falling back to bisection when a step leaves the bracket
+        brackets = numpy.nonzero(values[:-1] * values[1:] < 0)[0]
+        a = grid[brackets]
+        b = grid[brackets + 1]
+        fa = values[brackets]
+        x = (a + b) / 2
+        for i in range(iterations):
+            fx = function(x)
+            left = numpy.sign(fx) == numpy.sign(fa)
+            a = numpy.where(left, x, a)
+            fa = numpy.where(left, fx, fa)
+            b = numpy.where(left, b, x)
+            newton = x - fx / derivative(x)
+            outside = ~numpy.isfinite(newton) | (newton <= a) | (newton >= b)
+            stepped = numpy.where(fx == 0, x, numpy.where(outside, (a + b) / 2, newton))
+            converged = numpy.abs(stepped - x) <= tolerance * (1 + numpy.abs(x))
+            x = stepped
+            if converged.all():
+                break
+        candidates.append(x)
+        #roots that touch zero without changing sign are only found by unbracketed Newton steps
+        x = grid
+        for i in range(iterations):
+            step = function(x) / derivative(x)
+            x = x - numpy.where(numpy.isfinite(step), step, 0)
+            if (numpy.abs(step) <= tolerance * (1 + numpy.abs(x))).all():
+                break
+        fx = function(x)
+        converged = numpy.isfinite(x) & ((numpy.abs(step) <= tolerance * (1 + numpy.abs(x))) | (numpy.abs(fx) <= tolerance))
+        candidates.append(x[converged])
+        roots = numpy.sort(numpy.concatenate(candidates))
+        errors = numpy.abs(function(roots))
+    #roots closer than the square root of the tolerance are the same root, represented by its smallest residual
+    separation = math.sqrt(tolerance)
+    distinct = []
+    best = None
+    for root, error in zip(roots.tolist(), errors.tolist()):
+        if best is not None and root - distinct[-1] <= separation * (1 + abs(distinct[-1])):
+            if error < best:
+                distinct[-1] = root
+                best = error
+            continue
+        distinct.append(root)
+        best = error
+    return distinct
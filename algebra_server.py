@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import algebra_classes as alg_cl
+import algebra_ui as alg_ui
+
+def _dispatch(loop: asyncio.AbstractEventLoop, executor, line: bytes) -> tuple:
+    '''Starts the command of given request line in executor, returning the request id and the future of its record.'''
+    global COMMANDS
+    request_id = None
+    try:
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError('Requests must be JSON objects')
+        request_id = request.get('id')
+        command = request.get('command')
+        args = request.get('args')
+        if command not in COMMANDS:
+            raise ValueError('Unknown command '+repr(command)+', expected one of '+', '.join(COMMANDS))
+        if not isinstance(args, str):
+            raise ValueError('Command args must be an expression string')
+    except ValueError as error:
+        future = loop.create_future()
+        future.set_exception(error)
+        return (request_id, future)
+    return (request_id, loop.run_in_executor(executor, COMMANDS[command], args))
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, executor):
+    '''Serves the line delimited JSON requests of one connection, answering them in order while later ones are already running.'''
+    global PIPELINE_DEPTH
+    loop = asyncio.get_running_loop()
+    pending = asyncio.Queue(PIPELINE_DEPTH)
+    async def respond():
+        while True:
+            item = await pending.get()
+            if item is None:
+                return
+            request_id, future = item
+            try:
+                response = {'id' : request_id, 'result' : await future}
+            except Exception as error:
+                response = {'id' : request_id, 'error' : str(error)}
+            writer.write((json.dumps(response, default=str)+'\n').encode('utf-8'))
+            await writer.drain()
+    responder = asyncio.create_task(respond())
+    try:
+        while not responder.done():
+            line = await reader.readline()
+            if not line:
+                break
+            if line.strip():
+                await pending.put(_dispatch(loop, executor, line))
+    except (ValueError, ConnectionError):
+        #lines over the size limit and dropped connections end the session
+        pass
+    finally:
+        if not responder.done():
+            await pending.put(None)
+        try:
+            await responder
+        except ConnectionError:
+            pass
+        writer.close()
+    return
+
+async def serve(host: str = '127.0.0.1', port: int = 8765, path: str = None, processes: int = None, ready = None):
+    '''Serves solve and identify requests on a TCP port, or on a Unix socket when path is given, until cancelled.'''
+    import concurrent.futures
+    global MAX_LINE
+    #workers classify numbers with the backend of this process
+    with concurrent.futures.ProcessPoolExecutor(processes, initializer=alg_cl.set_backend, initargs=(alg_cl.BACKEND,)) as executor:
+        def connected(reader, writer):
+            return handle(reader, writer, executor)
+        if path is not None:
+            server = await asyncio.start_unix_server(connected, path, limit=MAX_LINE)
+        else:
+            server = await asyncio.start_server(connected, host, port, limit=MAX_LINE)
+        async with server:
+            if ready is not None:
+                ready(server)
+            await server.serve_forever()
+    return
+
+def main(argv: list = None):
+    '''Runs the solve server until interrupted.'''
+    import argparse
+    parser = argparse.ArgumentParser(description='Serves the algebraic expression solver over line delimited JSON.')
+    parser.add_argument('--unix', metavar='PATH', help='listen on a Unix socket at PATH instead of TCP')
+    parser.add_argument('--host', default='127.0.0.1', help='TCP address to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port to listen on')
+    parser.add_argument('--processes', type=int, default=None, help='number of solver worker processes (defaults to the cpu count)')
+    parser.add_argument('--backend', choices=alg_cl.BACKENDS, default=alg_cl.BACKEND, help='number type constants are classified as')
+    args = parser.parse_args(argv)
+    alg_cl.set_backend(args.backend)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.processes))
+    except KeyboardInterrupt:
+        pass
+    return
+
+COMMANDS = {'solve' : alg_ui.solve_record,
+            'identify' : alg_ui.identify_record}
+MAX_LINE = 16 * 1024 * 1024
+PIPELINE_DEPTH = 1024
+
+if __name__ == '__main__':
+    main()
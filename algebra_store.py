@@ -0,0 +1,124 @@
+import struct
+
+import algebra_classes as alg_cl
+import algebra_postfix as alg_post
+
+def dumps(expression: alg_cl._Node) -> bytes:
+    '''Encodes given Constant, Variable, Operation or Equation tree as versioned postfix bytes.'''
+    return alg_post.PostfixExpression.from_tree(expression).to_bytes()
+
+def loads(data: bytes) -> alg_cl._Node:
+    '''Decodes a tree encoded by dumps().'''
+    return alg_post.PostfixExpression.from_bytes(data).to_tree()
+
+def write_store(path: str, expressions) -> int:
+    '''Writes the encoding of each of given expressions to a store file at path, returning how many were written.'''
+    import array
+    global HEADER, MAGIC, VERSION
+    #records are streamed after the header and located by a table of offsets written after them
+    offsets = array.array('Q')
+    with open(path, 'wb') as store:
+        store.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+        position = HEADER.size
+        for expression in expressions:
+            data = dumps(expression)
+            offsets.append(position)
+            store.write(data)
+            position += len(data)
+        offsets.append(position)
+        store.write(struct.pack('<'+str(len(offsets))+'Q', *offsets))
+        store.seek(0)
+        store.write(HEADER.pack(MAGIC, VERSION, len(offsets) - 1, position))
+    return len(offsets) - 1
+
+class EquationStore():
+    '''A read only store file of encoded expressions, mapped into memory and decoded one record at a time.'''
+
+    def __init__(self, path: str):
+        import mmap
+        global HEADER, MAGIC, VERSION
+        self.path = path
+        with open(path, 'rb') as store:
+            #the mapping stays valid after the file is closed and its pages are shared by every process mapping it
+            self.map = mmap.mmap(store.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        if len(self.view) < HEADER.size:
+            self.close()
+            raise ValueError('Truncated equation store header in '+repr(path))
+        magic, version, self.count, self.table = HEADER.unpack_from(self.view, 0)
+        if magic != MAGIC or version != VERSION or self.table + 8 * (self.count + 1) > len(self.view):
+            self.close()
+            raise ValueError('Not a version '+str(VERSION)+' equation store: '+repr(path))
+        return
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self) -> 'EquationStore':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return
+
+    def close(self):
+        '''Releases the memory mapping.'''
+        self.view.release()
+        self.map.close()
+        return
+
+    def record(self, index: int) -> memoryview:
+        '''Returns a view of the encoded bytes of the expression at given index without copying them.'''
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError('Equation store index '+str(index)+' out of range')
+        start, stop = struct.unpack_from('<QQ', self.view, self.table + 8 * index)
+        return self.view[start:stop]
+
+    def __getitem__(self, index: int) -> alg_post.PostfixExpression:
+        record = self.record(index)
+        try:
+            return alg_post.PostfixExpression.decode(record)[0]
+        finally:
+            record.release()
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+    def tree(self, index: int) -> alg_cl._Node:
+        '''Returns the expression at given index as a tree.'''
+        return self[index].to_tree()
+
+_WORKER_STORE = None
+
+def _open_worker(path: str):
+    '''Maps the store at path once in a worker process.'''
+    global _WORKER_STORE
+    _WORKER_STORE = EquationStore(path)
+    return
+
+def _evaluate_range(task: tuple) -> list:
+    '''Evaluates the stored expressions from start up to stop with given values in a worker process.'''
+    global _WORKER_STORE
+    start, stop, values = task
+    return [_WORKER_STORE[index].evaluate(values) for index in range(start, stop)]
+
+def evaluate_store(path: str, values: dict, processes: int = None, chunksize: int = 4096) -> list:
+    '''Evaluates every expression of the store at path with given values keyed by variable name, across a pool of processes.'''
+    import multiprocessing
+    with EquationStore(path) as store:
+        count = len(store)
+        if processes == 1:
+            return [store[index].evaluate(values) for index in range(count)]
+    tasks = [(start, min(start + chunksize, count), values) for start in range(0, count, chunksize)]
+    results = []
+    with multiprocessing.Pool(processes, _open_worker, (path,)) as pool:
+        for chunk in pool.imap(_evaluate_range, tasks):
+            results.extend(chunk)
+    return results
+
+HEADER = struct.Struct('<4sBQQ')
+MAGIC = b'ALGS'
+VERSION = 1
@@ -1,4 +1,9 @@
+import time
+
 import algebra_classes as alg_cl
+import algebra_intervals as alg_int
+import algebra_linear as alg_lin
+import algebra_roots as alg_roots
 
 def close():
     '''Closes this application.'''
@@ -6,76 +11,428 @@ def close():
     print(GOODBYE)
     raise SystemExit
 
-def solve(exp_str: str):
+def solve(exp_str: str) -> tuple:
     '''The main solver function.'''
-    exp, vars_dict = identify(exp_str)
-    pass
+    #a system of equations is separated by semicolons
+    global INSTRUMENTATION
+    exps = []
+    vars_dict = dict()
+    for part_str in exp_str.split(';'):
+        exp, part_vars = identify(part_str)
+        exps.append(exp)
+        for key in part_vars:
+            vars_dict.setdefault(key)
+    #solve linear equalities for their unknowns and inequalities for the intervals of their variable
+    values = None
+    timed = INSTRUMENTATION.timed if INSTRUMENTATION.enabled else _untimed
+    if len(exps) == 1 and len(vars_dict) == 1 and isinstance(exps[0], alg_cl.Equal) and not alg_lin.is_linear(exps[0]):
+        #a nonlinear equation of one variable is solved numerically for all the roots found
+        values = {key : timed('solve', alg_roots.find_roots, exps[0]) for key in vars_dict}
+    elif all(isinstance(exp, alg_cl.Equal) for exp in exps):
+        values = timed('solve', alg_lin.solve_system, exps)
+    elif all(isinstance(exp, alg_cl.Equation) for exp in exps):
+        values = timed('solve', alg_int.solve_inequalities, exps)
+        #inequalities without variables either always hold or leave no values for the variables, and are impossible when there are no variables at all
+        constant = values.pop(None, None)
+        if constant is not None and len(constant) == 0:
+            if not vars_dict:
+                raise ValueError('Impossible equation')
+            for key in vars_dict:
+                values[key] = alg_int.IntervalSet()
+    if values is not None:
+        for key in values:
+            vars_dict[key] = values[key]
+        if INSTRUMENTATION.enabled:
+            INSTRUMENTATION.emit('solution', vars_dict)
+    if len(exps) == 1:
+        return (exps[0], vars_dict)
+    return (exps, vars_dict)
+
+def solve_record(exp_str: str) -> dict:
+    '''Solves given exp_str and returns a JSON serialisable record of the result or error.'''
+    try:
+        exp, vars_dict = solve(exp_str)
+    except (ValueError, TypeError) as error:
+        return {'expression' : exp_str, 'error' : str(error)}
+    if isinstance(exp, list):
+        return {'expression' : exp_str, 'result' : [str(part) for part in exp], 'variables' : vars_dict}
+    return {'expression' : exp_str, 'result' : str(exp), 'variables' : vars_dict}
+
+def identify_record(exp_str: str) -> dict:
+    '''Identifies given exp_str and returns a JSON serialisable record of the expression or error.'''
+    try:
+        exp, vars_dict = identify(exp_str)
+    except (ValueError, TypeError) as error:
+        return {'expression' : exp_str, 'error' : str(error)}
+    return {'expression' : exp_str, 'result' : str(exp), 'variables' : list(vars_dict)}
+
+def batch(in_stream, out_stream, processes: int = None, chunksize: int = 64):
+    '''Solves each line of in_stream across a pool of processes, writing JSON Lines results to out_stream in input order.'''
+    import itertools
+    import json
+    import multiprocessing
+    import os
+    global BATCH_WINDOWS
+    exp_strs = (line.strip() for line in in_stream if line.strip())
+    if processes == 1:
+        for record in map(solve_record, exp_strs):
+            out_stream.write(json.dumps(record, default=str)+'\n')
+        return
+    #workers classify numbers with the backend of this process
+    #lines are submitted in bounded windows so the input is never read far ahead of the output
+    window = chunksize * (processes or os.cpu_count() or 1) * BATCH_WINDOWS
+    with multiprocessing.Pool(processes, alg_cl.set_backend, (alg_cl.BACKEND,)) as pool:
+        while True:
+            exp_window = list(itertools.islice(exp_strs, window))
+            if not exp_window:
+                break
+            for record in pool.imap(solve_record, exp_window, chunksize):
+                out_stream.write(json.dumps(record, default=str)+'\n')
+    return
 
 def identify(exp_str: str):
     '''The main identification function.'''
-    global OPERATIONS
-    #find longest operation length
-    length = len(OPERATIONS.copy().popitem()[0])
-    for op in OPERATIONS:
-        if len(op) > length:
-            length = len(op)
-    ops = []
-    #order operations into list from largest to smallest
-    while length > 0:
-        for key in OPERATIONS:
-            if len(key) == length:
-                ops.append(key)
-        length -= 1
+    global PARSE_CACHE, INSTRUMENTATION
+    #reuse the result of an identical expression classified with the same numeric backend
+    exp_str = normalize(exp_str)
+    key = (alg_cl.BACKEND, exp_str)
+    cached = PARSE_CACHE.get(key)
+    if cached is not None:
+        return (cached[0], dict(cached[1]))
+    #stages are only timed and reported while instrumentation is enabled
+    enabled = INSTRUMENTATION.enabled
+    timed = INSTRUMENTATION.timed if enabled else _untimed
     #break expression into parts
-    parts = break_apart(ops, [exp_str.replace(' ','')])
-    #report expression parts
-    parts_str = ''
-    for part in parts:
-        parts_str += part + ' , '
-    parts_str = parts_str[0:-3]
-    print('|identified parts: '+parts_str+' ...')
+    parts = timed('tokenize', tokenize, exp_str)
+    if enabled:
+        INSTRUMENTATION.emit('parts', parts)
     #classify constants and variables
-    parts = alg_cl.Constant.classify(parts)
-    parts = alg_cl.Variable.classify(parts)
+    parts = timed('classify_constants', alg_cl.Constant.classify, parts)
+    parts = timed('classify_variables', alg_cl.Variable.classify, parts)
     #collate dictionary of identified variables
     vars_dict = dict()
     for part in parts:
         if isinstance(part, alg_cl.Variable):
             vars_dict.setdefault(part.name)
-    #report identified variables
-    vars_str = ''
-    for key in vars_dict:
-        vars_str += key + ' , '
-    vars_str = vars_str[0:-3]
-    print('|identified variables: '+vars_str+' ...')
-    #classify operations
-    parts = alg_cl.Product.classify(*parts)
-    parts = alg_cl.Sum.classify(*parts)
-    #classify equation
-    for part in parts:
-        if isinstance(part, str):
-            exp = OPERATIONS[part][1].classify(*parts)
-            break
-    #report identification completion
-    print('|identification successful: '+str(exp)+' ...')
-    return (exp, vars_dict)
-
-def break_apart(seps: list, exp: list) -> list:
-    '''Breaks given exp into parts using ops separators.'''
-    for sep in seps:
-        i = 0
-        while i < len(exp):
-            part = exp.pop(i)
-            if part.count(sep) > 0 and len(part) > len(sep):
-                parts = part.partition(sep)
-                for item in parts:
-                    exp.insert(i, item)
+    if enabled:
+        INSTRUMENTATION.emit('variables', list(vars_dict))
+    #classify operations and equation
+    exp = timed('parse', parse, parts)
+    if enabled:
+        INSTRUMENTATION.emit('identified', exp)
+    #cached trees are frozen so they cannot be changed by their users, keeping the order of their parts so caching does not change results
+    if PARSE_CACHE.maxsize > 0:
+        exp = alg_cl.freeze(exp)
+        PARSE_CACHE.put(key, (exp, vars_dict))
+    return (exp, dict(vars_dict))
+
+def _untimed(stage: str, function, *args):
+    '''Calls function with given args, ignoring stage.'''
+    return function(*args)
+
+def report(event: str, payload):
+    '''An instrumentation hook printing the progress of the solver.'''
+    if event == 'parts':
+        print('|identified parts: '+' , '.join(payload)+' ...')
+    elif event == 'variables':
+        print('|identified variables: '+' , '.join(payload)+' ...')
+    elif event == 'identified':
+        print('|identification successful: '+str(payload)+' ...')
+    elif event == 'solution':
+        solution_strs = []
+        for key in payload:
+            if isinstance(payload[key], alg_int.IntervalSet):
+                solution_strs.append(key + ' in ' + str(payload[key]))
+            elif payload[key] is not None:
+                solution_strs.append(key + ' = ' + str(payload[key]))
+        print('|solution: ' + ' , '.join(solution_strs) + ' ...')
+    return
+
+class Instrumentation():
+    '''Optional hooks, logging, stage timings and profiling of the identify and solve pipeline.'''
+
+    def __init__(self):
+        self.hooks = []
+        self.logger = None
+        self.timing = False
+        self.profiler = None
+        self.timings = dict()
+        self.enabled = False
+        return
+
+    def _update(self):
+        #the pipeline only checks this flag so disabled instrumentation costs nothing
+        self.enabled = len(self.hooks) > 0 or self.logger is not None or self.timing or self.profiler is not None
+        return
+
+    def add_hook(self, hook):
+        '''Calls hook with the name and payload of every event of the pipeline.'''
+        if not callable(hook):
+            raise TypeError('Instrumentation hooks must be callable, not '+repr(hook))
+        self.hooks.append(hook)
+        self._update()
+        return
+
+    def remove_hook(self, hook):
+        '''Stops calling given hook.'''
+        self.hooks.remove(hook)
+        self._update()
+        return
+
+    def set_logger(self, logger):
+        '''Logs every event of the pipeline at debug level to given logging.Logger, or stops logging when None.'''
+        self.logger = logger
+        self._update()
+        return
+
+    def time_stages(self, timing: bool = True):
+        '''Starts or stops accumulating the number of calls and seconds spent in each stage.'''
+        self.timing = timing
+        self._update()
+        return
+
+    def profile(self, profiling: bool = True):
+        '''Starts or stops profiling each stage, returning the cProfile.Profile collecting the statistics.'''
+        if profiling:
+            if self.profiler is None:
+                import cProfile
+                self.profiler = cProfile.Profile()
+            profiler = self.profiler
+        else:
+            profiler = self.profiler
+            self.profiler = None
+        self._update()
+        return profiler
+
+    def reset(self):
+        '''Clears the accumulated stage timings.'''
+        self.timings.clear()
+        return
+
+    def timed(self, stage: str, function, *args):
+        '''Calls function with given args as given stage of the pipeline.'''
+        start = time.perf_counter()
+        if self.profiler is not None:
+            result = self.profiler.runcall(function, *args)
+        else:
+            result = function(*args)
+        if self.timing:
+            counter = self.timings.setdefault(stage, [0, 0.0])
+            counter[0] += 1
+            counter[1] += time.perf_counter() - start
+        return result
+
+    def emit(self, event: str, payload):
+        '''Passes given event and payload to each hook and the logger.'''
+        for hook in self.hooks:
+            hook(event, payload)
+        if self.logger is not None:
+            self.logger.debug('%s: %s', event, payload)
+        return
+
+def normalize(exp_str: str) -> str:
+    '''Removes whitespace from given exp_str except single spaces separating numbers or identifiers.'''
+    pieces = exp_str.split()
+    if len(pieces) < 2:
+        return ''.join(pieces)
+    normal = [pieces[0]]
+    for piece in pieces[1:]:
+        last = normal[-1][-1]
+        first = piece[0]
+        if (last.isalnum() or last == '.') and (first.isalnum() or first == '.'):
+            normal.append(' ')
+        normal.append(piece)
+    return ''.join(normal)
+
+class ParseCache():
+    '''A bounded least recently used cache of identified expressions.'''
+
+    def __init__(self, maxsize: int):
+        if not isinstance(maxsize, int) or maxsize < 0:
+            raise ValueError('ParseCache size must be a non-negative int, not '+repr(maxsize))
+        self.maxsize = maxsize
+        self.entries = dict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        return
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: tuple) -> tuple:
+        '''Returns the cached value of given key, or None if it is not cached.'''
+        #entries are reinserted when used so the dict stays ordered from least to most recently used
+        value = self.entries.pop(key, None)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries[key] = value
+        return value
+
+    def put(self, key: tuple, value: tuple):
+        '''Caches given value under given key, evicting the least recently used entries beyond maxsize.'''
+        self.entries.pop(key, None)
+        self.entries[key] = value
+        self.resize(self.maxsize)
+        return
+
+    def resize(self, maxsize: int):
+        '''Changes the maximum number of cached entries, evicting any beyond it.'''
+        if not isinstance(maxsize, int) or maxsize < 0:
+            raise ValueError('ParseCache size must be a non-negative int, not '+repr(maxsize))
+        self.maxsize = maxsize
+        while len(self.entries) > maxsize:
+            del self.entries[next(iter(self.entries))]
+            self.evictions += 1
+        return
+
+    def clear(self):
+        '''Empties the cache and resets its counters.'''
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        return
+
+def tokenize(exp_str: str) -> list:
+    '''Breaks given exp_str into parts in a single left-to-right scan, matching the longest known operation.'''
+    global OPERATOR_TRIE, BRACKET_SYMBOLS
+    parts = []
+    length = len(exp_str)
+    i = 0
+    while i < length:
+        char = exp_str[i]
+        if char.isspace():
+            i += 1
+            continue
+        start = i
+        if char.isdecimal() or char == '.':
+            #numbers are digits with at most one decimal point
+            while i < length and exp_str[i].isdecimal():
+                i += 1
+            if i < length and exp_str[i] == '.':
+                i += 1
+                while i < length and exp_str[i].isdecimal():
                     i += 1
-                exp = break_apart(seps, exp)
-            else:
-                exp.insert(i, part)
+            if exp_str[start:i] == '.':
+                raise ValueError('Decimal point without digits at index '+str(start))
+        elif char.isalpha():
+            #identifiers start with a letter and continue with letters or digits
+            while i < length and exp_str[i].isalnum():
                 i += 1
-    return exp
+        elif char in BRACKET_SYMBOLS:
+            i += 1
+        else:
+            #walk the operator trie remembering the end of the longest complete symbol
+            node = OPERATOR_TRIE
+            end = start
+            j = start
+            while j < length and exp_str[j] in node:
+                node = node[exp_str[j]]
+                j += 1
+                if None in node:
+                    end = j
+            if end == start:
+                raise ValueError('Unrecognised symbol '+repr(char)+' at index '+str(i))
+            i = end
+        parts.append(exp_str[start:i])
+    return parts
+
+def parse(parts: list) -> (alg_cl.Equation, alg_cl.Operation, alg_cl.Variable, alg_cl.Constant):
+    '''Builds the expression tree of the given classified parts in one pass by operator precedence.'''
+    global OPERATIONS, BRACKETS, BRACKET_SYMBOLS
+    #open brackets and [subclass, symbol, operand count] runs of operations are kept on an explicit stack so deep brackets cannot exhaust the call stack
+    operands = []
+    operators = []
+    expect_operand = True
+    for part in parts:
+        if expect_operand:
+            if not isinstance(part, str):
+                operands.append(part)
+                expect_operand = False
+            elif part in BRACKETS:
+                operators.append(part)
+            else:
+                raise ValueError('Impossible equation')
+        elif isinstance(part, str) and part in OPERATIONS:
+            subclass = OPERATIONS[part][1]
+            #runs binding more tightly, or as tightly with another symbol, are complete before this one starts
+            while operators and not isinstance(operators[-1], str) and (operators[-1][0].precedence > subclass.precedence or (operators[-1][0].precedence == subclass.precedence and operators[-1][1] != part)):
+                reduce_operation(operands, operators.pop())
+            #the whole run of one symbol is gathered so each operation is built once
+            if operators and not isinstance(operators[-1], str) and operators[-1][1] == part:
+                operators[-1][2] += 1
+            else:
+                operators.append([subclass, part, 2])
+            expect_operand = True
+        elif isinstance(part, str) and part in BRACKET_SYMBOLS and part not in BRACKETS:
+            while operators and not isinstance(operators[-1], str):
+                reduce_operation(operands, operators.pop())
+            if not operators:
+                raise ValueError('Impossible equation')
+            if BRACKETS[operators.pop()] != part:
+                raise ValueError('Unbalanced brackets')
+        elif any(isinstance(operator, str) for operator in operators):
+            raise ValueError('Unbalanced brackets')
+        else:
+            raise ValueError('Impossible equation')
+    if expect_operand:
+        raise ValueError('Impossible equation')
+    while operators:
+        if isinstance(operators[-1], str):
+            raise ValueError('Unbalanced brackets')
+        reduce_operation(operands, operators.pop())
+    return operands[0]
+
+def reduce_operation(operands: list, run: list):
+    '''Replaces the operands of the given [subclass, symbol, operand count] run at the end of operands with the node it builds.'''
+    subclass, symbol, count = run
+    args = operands[len(operands)-count:]
+    del operands[len(operands)-count:]
+    try:
+        if issubclass(subclass, alg_cl.Equation):
+            if count != 2 or isinstance(args[0], alg_cl.Equation):
+                raise ValueError('Impossible equation')
+            node = subclass(*args)
+        else:
+            flat = []
+            for arg in args:
+                if isinstance(arg, subclass):
+                    flat.extend(arg.parts)
+                else:
+                    flat.append(arg)
+            node = subclass(*flat)
+    except TypeError:
+        raise ValueError('Impossible equation')
+    operands.append(node)
+    return
+
+def compile_operations(operations: dict) -> dict:
+    '''Builds a character trie of the given operation symbols for tokenize().'''
+    trie = dict()
+    for symbol in operations:
+        node = trie
+        for char in symbol:
+            node = node.setdefault(char, dict())
+        #the None key marks the end of a complete symbol
+        node[None] = symbol
+    return trie
+
+def register_operation(symbol: str, description: str, cls: type):
+    '''Adds an operation to the supported operations and recompiles the operator trie.'''
+    global OPERATIONS, OPERATOR_TRIE, BRACKET_SYMBOLS
+    if not isinstance(symbol, str) or not symbol:
+        raise TypeError('Operation symbols must be non-empty strings, not '+repr(symbol))
+    for char in symbol:
+        if char.isalnum() or char.isspace() or char == '.' or char in BRACKET_SYMBOLS:
+            raise ValueError('Operation symbols cannot contain '+repr(char))
+    if not (isinstance(cls, type) and issubclass(cls, (alg_cl.Operation, alg_cl.Equation))):
+        raise TypeError('Operations must be classified by an Operation or Equation class, not '+repr(cls))
+    OPERATIONS[symbol] = (description, cls)
+    OPERATOR_TRIE = compile_operations(OPERATIONS)
+    return
     
 def commands():
     '''Prints supported commands.'''
@@ -85,6 +442,21 @@ def commands():
         print(com + ' : ' + COMMANDS[com][0])
     return
 
+def cache():
+    '''Prints parse cache statistics.'''
+    global PARSE_CACHE
+    print('\nParse cache:')
+    print('entries : '+str(len(PARSE_CACHE))+' of '+str(PARSE_CACHE.maxsize))
+    print('hits : '+str(PARSE_CACHE.hits))
+    print('misses : '+str(PARSE_CACHE.misses))
+    print('evictions : '+str(PARSE_CACHE.evictions))
+    return
+
+def backend(name: str):
+    '''Selects the numeric backend constants are classified with.'''
+    alg_cl.set_backend(name)
+    return
+
 def operations():
     '''Prints list of supported operations.'''
     global OPERTIONS
@@ -115,17 +487,22 @@ def validate_com(inp : str):
         return
     #execute command
     print('|executing ' + com + '(' + args + ')...')
-    if COMMANDS[com][1] != 0:
-        COMMANDS[com][2](args)
-    else:
-        COMMANDS[com][2]()
+    try:
+        if COMMANDS[com][1] != 0:
+            COMMANDS[com][2](args)
+        else:
+            COMMANDS[com][2]()
+    except ValueError as error:
+        print('!' + str(error))
     return
 
 WELCOME = "Welcome to the Mader Algrebraic Expression Solver."
 COMMANDS = {'close' : ('closes this application', 0, close),
             'coms' : ('displays this command list', 0, commands),
             'ops' : ('displays a list of supported operations', 0, operations),
-            'solve' : ('solves the following algebraic expression', 1, solve)}
+            'solve' : ('solves the following algebraic expression, separate a system of equations with ;', 1, solve),
+            'cache' : ('displays parse cache statistics', 0, cache),
+            'backend' : ('selects the number type of constants: float, exact, fraction or decimal', 1, backend)}
 OPERATIONS = {'+' : ('addition', alg_cl.Sum),
               '*' : ('multiplication', alg_cl.Product),
               '=' : ('equal to', alg_cl.Equal),
@@ -134,18 +511,54 @@ OPERATIONS = {'+' : ('addition', alg_cl.Sum),
               '>=' : ('greater than or equal to', alg_cl.GreaterEqual),
               '<=' : ('lesser than or equal to', alg_cl.LesserEqual),
               '!=' : ('not equal to', alg_cl.NotEqual)}
+OPERATOR_TRIE = compile_operations(OPERATIONS)
 BRACKETS = {'(' : ')',
             '[' : ']',
             '{' : '}'}
+BRACKET_SYMBOLS = frozenset(BRACKETS) | frozenset(BRACKETS.values())
+PARSE_CACHE_SIZE = 1024
+BATCH_WINDOWS = 4
+PARSE_CACHE = ParseCache(PARSE_CACHE_SIZE)
+INSTRUMENTATION = Instrumentation()
 GOODBYE = "\nThank you for using the Mader Algebraic Expression Solver."
 COM_PROMPT = "\ncommand> "
 NOT_FOUND = "!command not found. check the supported commands"
 MANY_ARGS = "!too many arguments inputted"
 FEW_ARGS = "!too few arguments inputted"
 
+def main(argv: list = None):
+    '''Runs the interactive solver, or the batch solver when a batch file is given.'''
+    import argparse
+    import sys
+    global WELCOME, COM_PROMPT, INSTRUMENTATION
+    parser = argparse.ArgumentParser(description=WELCOME)
+    parser.add_argument('--batch', metavar='FILE', help='solve each line of FILE (- for stdin) and write JSON Lines results')
+    parser.add_argument('--output', metavar='FILE', default='-', help='where batch results are written (- for stdout)')
+    parser.add_argument('--processes', type=int, default=None, help='number of batch worker processes (defaults to the cpu count)')
+    parser.add_argument('--chunksize', type=int, default=64, help='number of expressions sent to a worker at a time')
+    parser.add_argument('--backend', choices=alg_cl.BACKENDS, default=alg_cl.BACKEND, help='number type constants are classified as')
+    args = parser.parse_args(argv)
+    alg_cl.set_backend(args.backend)
+    if args.batch is not None:
+        in_stream = sys.stdin if args.batch == '-' else open(args.batch)
+        out_stream = sys.stdout if args.output == '-' else open(args.output, 'w')
+        try:
+            batch(in_stream, out_stream, args.processes, args.chunksize)
+        finally:
+            if in_stream is not sys.stdin:
+                in_stream.close()
+            if out_stream is not sys.stdout:
+                out_stream.close()
+        return
+    INSTRUMENTATION.add_hook(report)
+    print(WELCOME)
+    commands()
+    while True:
+        try:
+            com = input(COM_PROMPT)
+        except EOFError:
+            close()
+        validate_com(com)
 
-print(WELCOME)
-commands()
-while True:
-    com = input(COM_PROMPT)
-    validate_com(com)
+if __name__ == '__main__':
+    main()
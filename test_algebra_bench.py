@@ -0,0 +1,22 @@
+import json
+
+import algebra_classes as alg_cl
+import algebra_ui as alg_ui
+from algebra_bench import generate, compare, main
+
+def test_generate():
+    exp_str = generate(50, depth=3, operators='+**', variables=3, seed=4)
+    assert exp_str==generate(50, depth=3, operators='+**', variables=3, seed=4)
+    assert isinstance(alg_ui.parse(alg_cl.Variable.classify(alg_cl.Constant.classify(alg_ui.tokenize(exp_str)))), alg_cl.Equal)
+    assert isinstance(alg_ui.parse(alg_cl.Variable.classify(alg_cl.Constant.classify(alg_ui.tokenize(generate(20, equation=''))))), alg_cl.Operation)
+
+def test_compare():
+    previous = [{'stage' : 'parse', 'size' : 10, 'seconds' : 1.0}, {'stage' : 'tokenize', 'size' : 10, 'seconds' : 1.0}]
+    results = [{'stage' : 'parse', 'size' : 10, 'seconds' : 1.05}, {'stage' : 'tokenize', 'size' : 10, 'seconds' : 1.5}]
+    assert compare(results, previous, 0.1)==[{'stage' : 'tokenize', 'size' : 10, 'seconds' : 1.5, 'previous_seconds' : 1.0}]
+
+def test_main(tmp_path):
+    results = main(['--sizes', '10,20', '--repeat', '1', '--no-cold-start', '--output', str(tmp_path / 'bench.json')])
+    assert len(results)==2 * len(set(result['stage'] for result in results))
+    assert json.loads((tmp_path / 'bench.json').read_text())['results']==results
+    main(['--sizes', '10', '--repeat', '1', '--no-cold-start', '--compare', str(tmp_path / 'bench.json')])
@@ -0,0 +1,222 @@
+import decimal
+import fractions
+import io
+
+import pytest
+
+import algebra_classes
+from algebra_classes import Constant, Variable, Operation, Sum, Product, Equation, Equal, Greater, Lesser, GreaterEqual, LesserEqual, NotEqual, intern, render, represent, set_backend, narrow, divide
+
+def test_constant():
+    assert Constant(5).value==5
+    assert repr(Constant(5))=='Constant(5)'
+    assert str(Constant(5))=='5'
+    assert Constant(5)>Constant(4)
+    assert Constant(4)<Constant(5)
+    assert Constant(3.4)==Constant(3.4)
+    assert Constant(2.0)<=Constant(2)
+    assert Constant(23)>=Constant(5.6)
+    assert Constant(-3)!=Constant(7/2)
+    assert Constant.classify(['12','=','3','*','x'])==[Constant(12),'=',Constant(3),'*','x']
+    assert hash(Constant(2))==hash(Constant(2.0))
+    assert Constant.classify(['3.4','.5','7.'])==[Constant(3.4),Constant(0.5),Constant(7.0)]
+    assert Constant(decimal.Decimal('1.5'))==Constant(fractions.Fraction(3, 2))
+    with pytest.raises(TypeError):
+        Constant(1j)
+
+def test_backend(monkeypatch):
+    monkeypatch.setattr(algebra_classes, 'BACKEND', 'exact')
+    parts = Constant.classify(['12','3.25','2.0'])
+    assert [type(part.value) for part in parts]==[int, fractions.Fraction, int]
+    assert Sum(*parts).simplify()==Constant(fractions.Fraction(69, 4))
+    set_backend('decimal')
+    assert Constant.classify(['0.1'])[0].value==decimal.Decimal('0.1')
+    set_backend('fraction')
+    assert type(Constant.classify(['4'])[0].value) is fractions.Fraction
+    with pytest.raises(ValueError):
+        set_backend('complex')
+
+def test_divide():
+    assert divide(6, 3)==2 and type(divide(6, 3)) is int
+    assert divide(1, 3)==fractions.Fraction(1, 3)
+    assert type(divide(fractions.Fraction(3, 2), fractions.Fraction(1, 2))) is int
+    assert divide(1.0, 4)==0.25
+    assert narrow(fractions.Fraction(4, 2))==2 and narrow(0.5)==0.5
+
+def test_variable():
+    assert Variable('x').name=='x'
+    assert repr(Variable('x'))=='Variable(\'x\')'
+    assert str(Variable('c'))=='c'
+    assert Variable('sd')==Variable('sd')
+    assert Variable('er')!=Variable('speed')
+    assert len({Variable('x'),Variable('x'),Variable('y')})==2
+    assert Variable.classify([Constant(12),'=',Constant(3),'*','x'])==[Constant(12),'=',Constant(3),'*',Variable('x')]
+
+def test_operation():
+    assert Operation(Constant(5),Variable('x')).parts==[Constant(5),Variable('x')]
+    assert Operation(Constant(4),Variable('r'),Operation(Constant(6),Variable('x')))==Operation(Constant(4),Variable('r'),Operation(Constant(6),Variable('x')))
+    assert hash(Operation(Constant(4),Variable('r')))==hash(Operation(Variable('r'),Constant(4)))
+    assert Operation(Variable('x'),Variable('x'),Variable('y'))!=Operation(Variable('x'),Variable('y'),Variable('y'))
+    assert Operation(Constant(2),Variable('x'),Constant(2.0))==Operation(Variable('x'),Constant(2.0),Constant(2))
+    #deep chains are compared without rehashing every subtree at every level
+    a = Variable('x')
+    b = Variable('x')
+    for i in range(5000):
+        a = Sum(Product(a,Constant(2)),Constant(1))
+        b = Sum(Constant(1),Product(Constant(2),b))
+    assert a==b and a!=Sum(Constant(2),Product(Constant(2),b))
+
+def test_sum():
+    assert repr(Sum(Constant(5),Variable('x')))=='Sum(Constant(5),Variable(\'x\'))'
+    assert str(Sum(Constant(5),Variable('x')))=='(5 + x)'
+    assert Sum(Constant(5),Constant(4)).evaluate(0,1)==Constant(9)
+    assert Sum(Constant(5),Variable('x'),Constant(4)).evaluate(0,2)==Sum(Constant(9),Variable('x'))
+    #interned sums keep their constants last
+    assert intern(Sum(Constant(5),Variable('x'),Constant(4))).evaluate(1,2)==Sum(Constant(9),Variable('x'))
+    assert Sum.classify(Constant(1),Sum.symbol,Constant(2),Sum.symbol,Variable('x'))==Sum(Constant(1),Constant(2),Variable('x'))
+    assert Sum.classify(Variable('x'),Sum.symbol,Sum(Constant(1),Variable('y')),Equal.symbol,Constant(3),Sum.symbol,Constant(4))==[Sum(Variable('x'),Constant(1),Variable('y')),Equal.symbol,Sum(Constant(3),Constant(4))]
+
+def test_product():
+    assert repr(Product(Constant(5),Variable('x')))=='Product(Constant(5),Variable(\'x\'))'
+    assert str(Product(Constant(5),Variable('x')))=='(5 * x)'
+    assert Product(Constant(5),Constant(4)).evaluate(1,0)==Constant(20)
+    assert Product(Constant(5),Variable('x'),Constant(4)).evaluate(2,0)==Product(Variable('x'),Constant(20))
+    assert Product.classify(Constant(1),Product.symbol,Constant(2),Product.symbol,Variable('x'))==Product(Constant(1),Constant(2),Variable('x'))
+    assert Product.classify(Constant(2),Product.symbol,Variable('x'),Sum.symbol,Variable('y'))==[Product(Constant(2),Variable('x')),Sum.symbol,Variable('y')]
+
+def test_equation():
+    assert Equation(Variable('velocity'),Variable('t')).lhs==Variable('velocity')
+    assert Equation(Constant(3.456),Constant(127)).rhs==Constant(127)
+    assert Equation(Constant(5),Variable('x'))==Equation(Constant(5),Variable('x'))
+
+def test_equal():
+    assert repr(Equal(Variable('x'),Constant(5)))=='Equal(Variable(\'x\'),Constant(5))'
+    assert str(Equal(Constant(12.78),Constant(45)))=='12.78 = 45'
+    assert Equal(Constant(5),Variable('f'))==Equal(Variable('f'),Constant(5))
+    assert Equal(Constant(78),Sum(Constant(3),Variable('y')))==Equal(Constant(78),Sum(Constant(3),Variable('y')))
+    assert Equal.classify(Variable('x'),Equal.symbol,Constant(5))==Equal(Variable('x'),Constant(5))
+
+def test_greater():
+    assert repr(Greater(Constant(7),Variable('d')))=='Greater(Constant(7),Variable(\'d\'))'
+    assert str(Greater(Variable('speed'),Constant(89)))=='speed > 89'
+    assert Greater(Variable('x'),Constant(5))==Lesser(Constant(5),Variable('x'))
+    assert hash(Greater(Variable('x'),Constant(5)))==hash(Lesser(Constant(5),Variable('x')))
+    assert Greater.classify(Variable('y'),Greater.symbol,Sum(Constant(3),Constant(4)))==Greater(Variable('y'),Sum(Constant(3),Constant(4)))
+
+def test_lesser():
+    assert repr(Lesser(Constant(3.4),Product(Constant(5),Variable('x'))))=='Lesser(Constant(3.4),Product(Constant(5),Variable(\'x\')))'
+    assert str(Lesser(Product(Variable('x'),Constant(90),Variable('y')),Constant(120.45)))=='(x * 90 * y) < 120.45'
+    assert Lesser(Sum(Variable('x'),Constant(7)),Product(Constant(8),Constant(23)))==Lesser(Sum(Variable('x'),Constant(7)),Product(Constant(8),Constant(23)))
+    assert Lesser(Product(Variable('x'),Sum(Constant(34),Variable('x'))),Constant(45))==Greater(Constant(45),Product(Variable('x'),Sum(Constant(34),Variable('x'))))
+    assert Lesser.classify(Constant(5),Lesser.symbol,Sum(Constant(3),Constant(2)))==Lesser(Constant(5),Sum(Constant(3),Constant(2)))
+
+def test_greater_equal():
+    assert repr(GreaterEqual(Variable('x'),Constant(5)))=='GreaterEqual(Variable(\'x\'),Constant(5))'
+    assert str(GreaterEqual(Sum(Constant(56),Variable('oxygen'),Constant(3.41)),Variable('hydrogen')))=='(56 + oxygen + 3.41) >= hydrogen'
+    assert GreaterEqual(Variable('x'),Product(Variable('x'),Constant(56)))==GreaterEqual(Variable('x'),Product(Variable('x'),Constant(56)))
+    assert GreaterEqual(Sum(Variable('x'),Constant(5)),Constant(5))==LesserEqual(Constant(5),Sum(Constant(5),Variable('x')))
+    assert GreaterEqual.classify(Sum(Constant(5),Variable('x')),GreaterEqual.symbol,Product(Variable('y'),Constant(1)))==GreaterEqual(Sum(Constant(5),Variable('x')),Product(Variable('y'),Constant(1)))
+
+def test_lesser_equal():
+    assert repr(LesserEqual(Constant(5),Constant(5)))=='LesserEqual(Constant(5),Constant(5))'
+    assert str(LesserEqual(Variable('x'),Product(Variable('x'),Constant(56),Constant(3.4))))=='x <= (x * 56 * 3.4)'
+    assert LesserEqual(Variable('dx'),Variable('dy'))==LesserEqual(Variable('dx'),Variable('dy'))
+    assert LesserEqual(Sum(Variable('f'),Variable('g')),Constant(7))==GreaterEqual(Constant(7),Sum(Variable('f'),Variable('g')))
+    assert LesserEqual.classify(Variable('speed'),LesserEqual.symbol,Constant(100))==LesserEqual(Variable('speed'),Constant(100))
+
+def test_not_equal():
+    assert repr(NotEqual(Constant(4),Variable('t')))=='NotEqual(Constant(4),Variable(\'t\'))'
+    assert str(NotEqual(Constant(3),Sum(Variable('x'),Variable('y'))))=='3 != (x + y)'
+    assert NotEqual(Variable('f'),Product(Constant(4),Constant(4)))==NotEqual(Variable('f'),Product(Constant(4),Constant(4)))
+    assert NotEqual(Sum(Variable('x'),Variable('y'),Variable('z')),Product(Constant(34),Constant(56)))==NotEqual(Product(Constant(56),Constant(34)),Sum(Variable('y'),Variable('z'),Variable('x')))
+    assert NotEqual.classify(Constant(5),NotEqual.symbol,Product(Variable('f'),Variable('g')))==NotEqual(Constant(5),Product(Variable('f'),Variable('g')))
+
+def test_intern():
+    assert intern(Sum(Constant(1),Product(Constant(2),Variable('x'))))is intern(Sum(Constant(1),Product(Constant(2),Variable('x'))))
+    assert intern(Equal(Variable('x'),Constant(5))).lhs is intern(Variable('x'))
+    assert intern(Sum(Constant(1),Variable('x'))).interned and not Sum(Constant(1),Variable('x')).interned
+    assert intern(Sum(Constant(1),Variable('x')))==Sum(Variable('x'),Constant(1))
+    assert intern(Sum(Variable('x'),Product(Variable('y'),Constant(2))))is intern(Sum(Product(Constant(2),Variable('y')),Variable('x')))
+    assert str(intern(Sum(Constant(1),Product(Variable('y'),Constant(2)),Variable('x'))))=='(x + (2 * y) + 1)'
+    frozen = algebra_classes.freeze(Sum(Variable('y'),Product(Variable('x'),Constant(3))))
+    assert str(frozen)=='(y + (x * 3))' and frozen.interned and intern(frozen) is intern(Sum(Product(Constant(3),Variable('x')),Variable('y')))
+    with pytest.raises(AttributeError):
+        frozen.parts = []
+    #deep trees are interned and hashed without recursing once per level
+    deep = Variable('x')
+    for i in range(5000):
+        deep = Sum(Product(deep,Constant(2)),Constant(1))
+    assert hash(deep)==hash(intern(deep)) and intern(deep)==deep
+
+def test_compile():
+    assert Sum(Product(Constant(3),Variable('x')),Variable('y'),Constant(0.5)).compile()(2,1)==7.5
+    assert Sum(Variable('x'),Constant(1)).compile(['y','x'])(10,2)==3
+    assert Equal(Product(Variable('x'),Variable('x')),Constant(9)).compile()(3)
+    assert not Greater(Variable('x'),Variable('y')).compile({'y' : None, 'x' : None})(2,1)
+    #wide operations compile however many parts they have
+    assert Sum(*[Variable('x')] * 20000, Constant(1)).compile()(2)==40001
+    assert Product(*[Variable('x')] * 10000).compile()(1)==1
+
+def test_simplify():
+    assert Sum(Product(Constant(3),Variable('x')),Product(Variable('x'),Constant(4))).simplify()==Product(Constant(7),Variable('x'))
+    assert Sum(Constant(1),Sum(Variable('x'),Constant(2)),Variable('x')).simplify()==Sum(Product(Constant(2),Variable('x')),Constant(3))
+    assert Product(Constant(2),Product(Variable('x'),Constant(3)),Variable('y')).simplify()==Product(Constant(6),Variable('x'),Variable('y'))
+    assert Sum(Product(Variable('x'),Variable('y')),Product(Constant(-1),Variable('y'),Variable('x'))).simplify()==Constant(0)
+    assert Equal(Sum(Variable('x'),Variable('x')),Product(Constant(2),Constant(2))).simplify()==Equal(Product(Constant(2),Variable('x')),Constant(4))
+    assert Sum(Variable('x'),Constant(1)).simplify().simplify() is Sum(Variable('x'),Constant(1)).simplify()
+    deep = Variable('x')
+    for i in range(5000):
+        deep = Sum(Product(deep,Constant(1)),Constant(0))
+    shared = intern(deep)
+    assert deep.simplify() is Variable('x').simplify() and shared._simplified is shared.simplify()
+
+def test_evaluate_batch():
+    numpy = pytest.importorskip('numpy')
+    import array
+    x = numpy.array([1.0, 2.0, 3.0])
+    y = array.array('d', [3.0, 2.0, 1.0])
+    assert Sum(Product(Constant(2),Variable('x')),Variable('y')).evaluate_batch({'x' : x, 'y' : y}).tolist()==[5.0, 6.0, 7.0]
+    assert GreaterEqual(Variable('x'),Variable('y')).evaluate_batch({'x' : x, 'y' : y}).tolist()==[False, True, True]
+    assert Equal(Constant(1),Constant(1)).evaluate_batch({'x' : x}).tolist()==[True, True, True]
+
+def test_render():
+    assert render(Equal(Sum(Product(Constant(2),Variable('x')),Constant(3)),Constant(4)))=='((2 * x) + 3) = 4'
+    assert render(Equal(Sum(Product(Constant(2),Variable('x')),Constant(3)),Constant(4)), minimal=True)=='2 * x + 3 = 4'
+    assert render(Product(Sum(Variable('a'),Variable('b')),Product(Variable('c'),Variable('d'))), minimal=True)=='(a + b) * c * d'
+    stream = io.StringIO()
+    assert render(Sum(Constant(1),Variable('x')), stream) is None
+    assert stream.getvalue()=='(1 + x)'
+    #trees far deeper than the recursion limit are rendered
+    deep = Variable('x')
+    for i in range(20000):
+        deep = Sum(Product(deep,Constant(2)),Constant(1))
+    assert render(deep).count('(')==40000
+    assert render(deep, minimal=True).count('(')==19999
+
+def test_represent():
+    assert represent(NotEqual(Constant(4),Product(Variable('t'),Constant(2.5))))=='NotEqual(Constant(4),Product(Variable(\'t\'),Constant(2.5)))'
+    stream = io.StringIO()
+    represent(Sum(Constant(1),Variable('x')), stream)
+    assert stream.getvalue()==repr(Sum(Constant(1),Variable('x')))
+
+def test_diff():
+    x = Variable('x')
+    assert Product(Constant(3),x,x).diff('x')==Sum(Product(Constant(3),x),Product(Constant(3),x))
+    assert Sum(Product(Constant(2),Variable('y')),x).diff('x')==Constant(1)
+    assert Equal(Product(x,Variable('y')),Constant(4)).diff('y')==Equal(x,Constant(0))
+    #a product of n factors has a derivative of about 3n distinct nodes instead of n squared
+    factors = [Sum(x,Constant(i)) for i in range(200)]
+    derivative = Product(*factors).diff('x')
+    distinct = set()
+    stack = [derivative]
+    while stack:
+        node = stack.pop()
+        if id(node) not in distinct:
+            distinct.add(id(node))
+            if isinstance(node, Operation):
+                stack.extend(node.parts)
+    assert len(distinct) < 5 * len(factors)
+    factors = [Sum(x,Constant(i)) for i in range(1, 6)]
+    assert Product(*factors).diff('x').compile(['x'])(0.0)==pytest.approx(120 * (1 + 1/2 + 1/3 + 1/4 + 1/5))
+    with pytest.raises(TypeError):
+        x.diff(x)
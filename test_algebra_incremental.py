@@ -0,0 +1,35 @@
+import pytest
+
+from algebra_classes import Constant, Variable, Sum, Product, Equal, Greater
+from algebra_incremental import EvaluationContext
+from algebra_ui import identify
+
+def test_evaluation_context():
+    x = Variable('x')
+    lhs = Sum(Product(Constant(2),x),Variable('y'),Product(x,Variable('z')))
+    context = EvaluationContext(Equal(lhs,Constant(10)), {'x' : 1, 'y' : 2, 'z' : 6})
+    assert context.evaluate() is True
+    assert (context.recomputed, context.reused)==(4, 0)
+    #only the sum and the equation depend on y
+    context.set('y', 3)
+    assert context.evaluate() is False and context.value_of(lhs)==11
+    assert (context.recomputed, context.reused)==(6, 2 + 4)
+    context.set('y', 3)
+    context.evaluate()
+    assert context.recomputed==6
+    context.set('z', None)
+    with pytest.raises(ValueError):
+        context.evaluate()
+    with pytest.raises(ValueError):
+        context.set('w', 1)
+
+def test_evaluation_context_wide():
+    exp, vars_dict = identify('+'.join('x'+str(i)+'*'+str(i) for i in range(1000))+'>0')
+    context = EvaluationContext(exp, dict((key, 1.0) for key in vars_dict), width=10)
+    assert context.value_of(exp.lhs)==sum(range(1000))
+    before = context.recomputed
+    context.set('x999', 2.0)
+    assert context.value_of(exp.lhs)==sum(range(1000)) + 999
+    #the product, the two groups of ten parts above it, the sum and the equation
+    assert context.recomputed - before==5
+    assert isinstance(exp, Greater)
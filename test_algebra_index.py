@@ -0,0 +1,38 @@
+import pytest
+
+from algebra_classes import Constant, Variable, Sum, Product, Equal, NotEqual, Greater, Lesser
+from algebra_index import EquationIndex, fingerprint, probably_equivalent
+from algebra_ui import identify
+
+def test_equation_index():
+    index = EquationIndex()
+    x, y = Variable('x'), Variable('y')
+    assert index.add(Equal(Sum(x,Product(Constant(2),y)),Constant(4)))==0
+    index.add(Equal(Constant(4),Sum(Product(y,Constant(2)),x)))
+    index.add(Lesser(Constant(4),Sum(x,y)))
+    index.add(Greater(Sum(y,x),Constant(4)))
+    index.add(NotEqual(Sum(y,x),Constant(4)))
+    assert len(index)==5 and index.groups()==[[0, 1], [2, 3]]
+    assert index.find(Equal(Constant(4),Sum(x,Product(Constant(2),y))))==[0, 1]
+    assert Greater(Constant(4),Sum(x,y)) not in index and index.find(Greater(Constant(4),Sum(x,y)))==[]
+    with pytest.raises(ValueError):
+        index.equivalent(Equal(x,y))
+    with pytest.raises(TypeError):
+        index.add(x)
+
+def test_equivalent():
+    index = EquationIndex(probabilistic=True)
+    for exp_str in ('2*x+2*y=4', 'x+y=2', 'x*x<1', '3*x>y+1', 'x*(x+1)=x+1'):
+        index.add(identify(exp_str)[0])
+    assert index.equivalent(identify('y+x=2')[0])==[0, 1]
+    assert index.equivalent(identify('2>x+y')[0])==[]
+    assert index.equivalent(identify('1>x*x')[0])==[2]
+    assert index.equivalent(identify('y+1<3*x')[0])==[3]
+    assert index.equivalent(identify('x*x=1')[0])==[4]
+
+def test_probably_equivalent():
+    assert probably_equivalent(identify('x*(y+1)=0')[0], identify('x*y+x=0')[0])
+    assert probably_equivalent(identify('4*x>=2')[0], identify('2*x>=1')[0])
+    assert not probably_equivalent(identify('4*x>=2')[0], identify('1>=2*x')[0])
+    assert not probably_equivalent(identify('x*x=1')[0], identify('x=1')[0])
+    assert fingerprint(identify('2=2')[0])==fingerprint(identify('0=0')[0])
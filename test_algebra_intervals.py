@@ -0,0 +1,49 @@
+import math
+
+import pytest
+
+from algebra_classes import Constant, Variable, Sum, Product, Equation, Equal, Greater, Lesser, GreaterEqual, LesserEqual, NotEqual
+from algebra_intervals import IntervalSet, solve_inequality, solve_inequalities
+
+def test_interval_set():
+    intervals = IntervalSet([(5, 7, False, False), (1, 2, True, True), (0, 1, True, False), (-3, -1, False, True), (4, 3, True, True)])
+    assert intervals.intervals()==[(-3, -1, False, True), (0, 2, True, True), (5, 7, False, False)]
+    assert str(intervals)=='(-3, -1] U [0, 2] U (5, 7)'
+    assert [value in intervals for value in (-3, -1, 0, 2, 2.5, 5, 6, 7)]==[False, True, True, True, False, False, True, False]
+    assert intervals.mask([-2, 3])==[True, False]
+    assert str(IntervalSet.point(4))=='{4}'
+    assert 1 not in IntervalSet()
+
+def test_interval_set_operations():
+    intervals = IntervalSet([(0, 2, True, True), (5, 7, False, False)])
+    assert str(~intervals)=='(-inf, 0) U (2, 5] U [7, inf)'
+    assert ~~intervals==intervals
+    assert str(intervals & IntervalSet([(1, 6, False, True)]))=='(1, 2] U (5, 6]'
+    assert str(intervals | IntervalSet([(2, 5, False, False)]))=='[0, 5) U (5, 7)'
+    assert intervals & IntervalSet()==IntervalSet()
+    assert IntervalSet.above(3, True) & IntervalSet.below(3, True)==IntervalSet.point(3)
+
+def test_interval_set_mask():
+    numpy = pytest.importorskip('numpy')
+    intervals = IntervalSet([(-3, -1, False, True), (0, 2, True, True), (5, math.inf, False, False)])
+    values = numpy.array([-4, -3, -1, 0, 2, 3, 5, 6.0])
+    assert intervals.mask(values).tolist()==[value in intervals for value in values.tolist()]
+    assert IntervalSet().mask(values).tolist()==[False] * 8
+
+def test_solve_inequality():
+    assert solve_inequality(Greater(Product(Constant(2),Variable('x')),Constant(4)))==('x', IntervalSet.above(2.0, False))
+    assert solve_inequality(Lesser(Product(Constant(-2),Variable('x')),Constant(4)))==('x', IntervalSet.above(-2.0, False))
+    assert solve_inequality(LesserEqual(Sum(Variable('x'),Constant(1)),Constant(4)))==('x', IntervalSet.below(3, True))
+    assert solve_inequality(GreaterEqual(Constant(4),Product(Constant(2),Variable('x'))))==('x', IntervalSet.below(2.0, True))
+    assert solve_inequality(Equal(Variable('x'),Constant(4)))==('x', IntervalSet.point(4.0))
+    assert solve_inequality(NotEqual(Variable('x'),Constant(4)))==('x', ~IntervalSet.point(4.0))
+    assert solve_inequality(Greater(Constant(1),Constant(2)))==(None, IntervalSet())
+    assert solve_inequality(GreaterEqual(Variable('x'),Variable('x')))==('x', IntervalSet.everything())
+    with pytest.raises(ValueError):
+        solve_inequality(Greater(Variable('x'),Variable('y')))
+    with pytest.raises(TypeError):
+        solve_inequality(Equation(Variable('x'),Constant(1)))
+
+def test_solve_inequalities():
+    solutions = solve_inequalities([Greater(Variable('x'),Constant(2)),LesserEqual(Variable('x'),Constant(10)),NotEqual(Variable('x'),Constant(5)),Lesser(Constant(1),Variable('y'))])
+    assert solutions=={'x' : IntervalSet([(2, 5, False, False), (5, 10, False, True)]), 'y' : IntervalSet.above(1, False)}
@@ -0,0 +1,42 @@
+import pytest
+
+from algebra_classes import Constant, Variable, Sum, Product, Equal, Greater
+from algebra_linear import linear_form, solve_system
+
+def test_linear_form():
+    assert linear_form(Sum(Product(Constant(3),Variable('x'),Constant(2)),Constant(4),Product(Constant(2),Sum(Variable('x'),Variable('y')))))=={'x' : 8, None : 4, 'y' : 2}
+    assert linear_form(Constant(5))=={None : 5}
+    with pytest.raises(ValueError):
+        linear_form(Product(Variable('x'),Sum(Constant(34),Variable('x'))))
+    deep = Variable('x')
+    for i in range(5000):
+        deep = Sum(Product(deep,Constant(1)),Constant(1))
+    assert linear_form(deep)=={'x' : 1, None : 5000}
+
+def test_solve_system():
+    assert solve_system([Equal(Sum(Product(Constant(2),Variable('x')),Constant(3)),Constant(11))])=={'x' : 4.0}
+    assert solve_system([Equal(Sum(Variable('x'),Variable('y')),Constant(3)),Equal(Sum(Variable('x'),Product(Constant(-1),Variable('y'))),Constant(1))])=={'x' : 2.0, 'y' : 1.0}
+    assert solve_system([Equal(Sum(Variable('x'),Variable('y')),Constant(3)),Equal(Variable('z'),Constant(3))])=={'z' : 3.0}
+    assert solve_system([Equal(Variable('x'),Variable('x'))])=={}
+    with pytest.raises(ValueError):
+        solve_system([Equal(Variable('x'),Constant(1)),Equal(Variable('x'),Constant(2))])
+    with pytest.raises(TypeError):
+        solve_system([Greater(Variable('x'),Constant(1))])
+
+def test_solve_sparse_system():
+    #a tridiagonal system of many variables given in a scrambled order
+    size = 2000
+    equations = []
+    for i in range(size):
+        parts = [Product(Constant(4.0),Variable('x'+str(i)))]
+        if i > 0:
+            parts.append(Product(Constant(-1.0),Variable('x'+str(i-1))))
+        if i < size - 1:
+            parts.append(Product(Constant(-1.0),Variable('x'+str(i+1))))
+        equations.append(Equal(Sum(*parts),Constant(float(i))))
+    equations = equations[::2] + equations[1::2]
+    values = solve_system(equations)
+    assert len(values)==size
+    for equation in equations:
+        form = linear_form(equation.lhs)
+        assert sum(form[key] * values[key] for key in form)==pytest.approx(equation.rhs.value)
@@ -0,0 +1,41 @@
+import pytest
+
+from algebra_classes import Constant, Variable, Sum, Product, Equal, Greater
+from algebra_polynomial import Polynomial, expand
+
+def test_polynomial():
+    assert Polynomial(('y','x'),{(0,1) : 2, (1,0) : 0, (0,0) : 3})==Polynomial(('x',),{(1,) : 2, (0,) : 3})
+    assert Polynomial.variable('x') * Polynomial.constant(0)==Polynomial()
+    assert Polynomial.variable('x') - Polynomial.variable('x')==Polynomial()
+    assert (Polynomial.variable('x') + Polynomial.constant(1)) ** 3==Polynomial(('x',),{(3,) : 1, (2,) : 3, (1,) : 3, (0,) : 1})
+    assert hash(Polynomial.variable('x') + Polynomial.variable('y'))==hash(Polynomial.variable('y') + Polynomial.variable('x'))
+    assert (Polynomial.variable('x') * Polynomial.variable('y') ** 2).degree()==3
+    with pytest.raises(ValueError):
+        Polynomial(('x',),{(1,2) : 1})
+
+def test_polynomial_trees():
+    assert Polynomial.from_tree(Product(Sum(Variable('x'),Constant(1)),Sum(Variable('y'),Constant(2))))==Polynomial.from_tree(Sum(Product(Variable('x'),Variable('y')),Product(Constant(2),Variable('x')),Variable('y'),Constant(2)))
+    assert Polynomial.from_tree(Sum(Variable('x'),Constant(1),Product(Constant(2),Variable('x')))).to_tree()==Sum(Product(Constant(3),Variable('x')),Constant(1))
+    assert Polynomial().to_tree()==Constant(0)
+    assert Polynomial.variable('x').to_tree()==Variable('x')
+    with pytest.raises(TypeError):
+        Polynomial.from_tree(Equal(Variable('x'),Constant(1)))
+
+def test_expand():
+    assert expand(Product(Sum(Variable('x'),Constant(1)),Sum(Variable('x'),Constant(1))))==Sum(Product(Variable('x'),Variable('x')),Product(Constant(2),Variable('x')),Constant(1))
+    assert expand(Greater(Product(Sum(Variable('x'),Variable('y')),Sum(Variable('x'),Product(Constant(-1),Variable('y')))),Constant(0)))==Greater(Sum(Product(Variable('x'),Variable('x')),Product(Constant(-1),Variable('y'),Variable('y'))),Constant(0))
+
+def test_expand_many_sums():
+    #twenty factors of four terms expand to only the distinct monomials of degree twenty or less
+    total = Sum(Variable('x'),Variable('y'),Variable('z'),Constant(1))
+    polynomial = Polynomial.from_tree(Product(*[total] * 20))
+    assert len(polynomial.terms)==1771
+    assert polynomial.terms[(0,0,0)]==1 and polynomial.terms[(20,0,0)]==1
+
+def test_wide_sum():
+    #a sum of many distinct variables is converted in one pass
+    polynomial = Polynomial.from_tree(Sum(*[Variable('v'+str(i)) for i in range(2000)], Constant(3), Variable('v7')))
+    assert len(polynomial.variables)==2000 and len(polynomial.terms)==2001
+    index = polynomial.variables.index('v7')
+    assert polynomial.terms[tuple(1 if i == index else 0 for i in range(2000))]==2
+    assert polynomial.terms[(0,) * 2000]==3
@@ -0,0 +1,66 @@
+import fractions
+
+import pytest
+
+from algebra_classes import Constant, Variable, Sum, Product, Equal, NotEqual, Greater, Lesser, GreaterEqual, LesserEqual, intern
+from algebra_postfix import PostfixExpression, residual
+
+def test_from_tree():
+    flat = PostfixExpression.from_tree(Sum(Product(Constant(2),Variable('x')),Variable('x'),Constant(2.0)))
+    assert list(flat.opcodes)==[0, 1, 3, 1, 0, 2]
+    assert list(flat.operands)==[0, 0, 2, 0, 1, 3]
+    assert flat.constants==[2, 2.0] and flat.names==['x']
+    with pytest.raises(TypeError):
+        PostfixExpression.from_tree(3)
+
+def test_to_tree():
+    tree = Greater(Sum(Product(Constant(3),Variable('x'),Variable('y')),Constant(fractions.Fraction(1, 2))),Variable('y'))
+    assert PostfixExpression.from_tree(tree).to_tree()==tree
+    deep = Variable('x')
+    for i in range(10000):
+        deep = Sum(Product(deep,Constant(2)),Constant(1))
+    assert len(PostfixExpression.from_tree(deep).to_tree().parts)==2
+
+def test_evaluate():
+    flat = PostfixExpression.from_tree(Sum(Product(Constant(2),Variable('x')),Variable('y'),Constant(1)))
+    assert flat.evaluate({'x' : 3, 'y' : 4})==11
+    assert PostfixExpression.from_tree(Lesser(Variable('x'),Constant(2))).evaluate({'x' : 1}) is True
+    with pytest.raises(ValueError):
+        flat.evaluate({'x' : 3})
+
+def test_residual():
+    flat = residual(Equal(Product(Constant(fractions.Fraction(1, 2)),Variable('x')),Sum(Variable('y'),Constant(3))))
+    assert all(type(value) is float for value in flat.constants)
+    assert flat.evaluate({'x' : 4, 'y' : 1})==-2.0
+
+def test_equality():
+    a = PostfixExpression.from_tree(Equal(Sum(Variable('x'),Product(Constant(2),Variable('y'))),Constant(1)))
+    b = PostfixExpression.from_tree(Equal(Sum(Product(Variable('y'),Constant(2.0)),Variable('x')),Constant(1)))
+    c = PostfixExpression.from_tree(Equal(Constant(1),Sum(Variable('x'),Product(Constant(2),Variable('y')))))
+    assert a==b and hash(a)==hash(b)
+    assert a==c and hash(a)==hash(c)
+    x = Variable('x')
+    five = Constant(5)
+    assert PostfixExpression.from_tree(Equal(x,five))==PostfixExpression.from_tree(Equal(five,x))
+    assert PostfixExpression.from_tree(Greater(x,five))==PostfixExpression.from_tree(Lesser(five,x))
+    assert PostfixExpression.from_tree(Greater(x,five))!=PostfixExpression.from_tree(Lesser(x,five))
+    assert PostfixExpression.from_tree(GreaterEqual(five,x))==PostfixExpression.from_tree(LesserEqual(x,five))
+    assert PostfixExpression.from_tree(NotEqual(x,five))!=PostfixExpression.from_tree(Equal(x,five))
+    tree = Sum(Product(Constant(2),Variable('x')),Variable('y'))
+    assert hash(PostfixExpression.from_tree(tree))==hash(tree)==hash(intern(tree))
+    assert hash(PostfixExpression.from_tree(Greater(Variable('x'),tree)))==hash(Greater(Variable('x'),tree))
+
+def test_bytes():
+    tree = Equal(Sum(Product(Constant(0.1),Variable('speed')),Constant(fractions.Fraction(2, 3)),Constant(7)),Variable('tiempo'))
+    flat = PostfixExpression.from_tree(tree)
+    data = flat.to_bytes()
+    copy = PostfixExpression.from_bytes(data)
+    assert copy==flat and copy.constants==flat.constants and copy.to_tree()==tree
+    assert [type(value) for value in copy.constants]==[float, fractions.Fraction, int]
+    assert PostfixExpression.decode(b'xx'+data, 2)[1]==len(data)+2
+    with pytest.raises(ValueError):
+        PostfixExpression.from_bytes(b'XXXX'+data[4:])
+    with pytest.raises(ValueError):
+        PostfixExpression.from_bytes(data+b'\x00')
+    with pytest.raises(ValueError):
+        PostfixExpression.from_bytes(data[:-1])
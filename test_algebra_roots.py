@@ -0,0 +1,32 @@
+import fractions
+
+import pytest
+
+from algebra_classes import Constant, Variable, Sum, Product, Equal, Greater
+from algebra_linear import is_linear
+from algebra_roots import find_roots
+from algebra_ui import solve
+
+def test_find_roots():
+    pytest.importorskip('numpy')
+    x = Variable('x')
+    assert find_roots(Equal(Product(x,Sum(Constant(34),x)),Constant(0)))==[-34.0, 0.0]
+    cubic = Equal(Product(Sum(x,Constant(1)),Sum(x,Constant(2)),Sum(x,Constant(3))),Constant(0))
+    assert find_roots(cubic)==pytest.approx([-3.0, -2.0, -1.0])
+    #a double root touches zero without a sign change
+    assert find_roots(Equal(Product(Sum(x,Constant(-5)),Sum(x,Constant(-5))),Constant(0)))==pytest.approx([5.0])
+    assert find_roots(Equal(Product(x,x),Constant(fractions.Fraction(-1, 4))))==[]
+    assert find_roots(Equal(Product(x,x),Constant(4)), low=0.5, high=10.0, starts=11)==pytest.approx([2.0])
+    with pytest.raises(TypeError):
+        find_roots(Greater(x,Constant(1)))
+    with pytest.raises(ValueError):
+        find_roots(Equal(Product(x,Variable('y')),Constant(1)))
+    with pytest.raises(ValueError):
+        find_roots(Equal(Product(x,x),Product(x,x)))
+    with pytest.raises(ValueError):
+        find_roots(Equal(Product(Sum(x,x),x),Sum(Product(x,x),Product(x,x))))
+
+def test_solve_nonlinear():
+    pytest.importorskip('numpy')
+    assert not is_linear(Equal(Product(Variable('x'),Variable('x')),Constant(2)))
+    assert solve('x*(34+x)=0')[1]=={'x' : [-34.0, 0.0]}
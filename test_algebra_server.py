@@ -0,0 +1,47 @@
+import asyncio
+import json
+
+from algebra_server import serve
+
+async def exchange(open_connection, lines: list) -> list:
+    reader, writer = await open_connection()
+    #every request is sent before any response is read
+    writer.write(''.join(line+'\n' for line in lines).encode('utf-8'))
+    await writer.drain()
+    responses = [json.loads(await reader.readline()) for line in lines if line.strip()]
+    writer.close()
+    return responses
+
+async def run_server(tmp_path) -> tuple:
+    started = asyncio.get_running_loop().create_future()
+    task = asyncio.create_task(serve(port=0, processes=1, ready=started.set_result))
+    server = await started
+    port = server.sockets[0].getsockname()[1]
+    unix_path = str(tmp_path / 'solver.sock')
+    unix_started = asyncio.get_running_loop().create_future()
+    unix_task = asyncio.create_task(serve(path=unix_path, processes=1, ready=unix_started.set_result))
+    await unix_started
+    try:
+        requests = [json.dumps({'id' : 1, 'command' : 'solve', 'args' : '2*x+3=11'}),
+                    '',
+                    json.dumps({'id' : 'b', 'command' : 'identify', 'args' : 'y*2>=4'}),
+                    json.dumps({'id' : 3, 'command' : 'solve', 'args' : '2*'}),
+                    json.dumps({'id' : 4, 'command' : 'close', 'args' : ''}),
+                    'not json']
+        tcp = exchange(lambda: asyncio.open_connection('127.0.0.1', port), requests)
+        other = exchange(lambda: asyncio.open_connection('127.0.0.1', port), requests[:1])
+        unix = exchange(lambda: asyncio.open_unix_connection(unix_path), requests[2:3])
+        return await asyncio.gather(tcp, other, unix)
+    finally:
+        task.cancel()
+        unix_task.cancel()
+        await asyncio.gather(task, unix_task, return_exceptions=True)
+
+def test_serve(tmp_path):
+    tcp, other, unix = asyncio.run(run_server(tmp_path))
+    assert tcp[0]=={'id' : 1, 'result' : {'expression' : '2*x+3=11', 'result' : '((2.0 * x) + 3.0) = 11.0', 'variables' : {'x' : 4.0}}}
+    assert tcp[1]=={'id' : 'b', 'result' : {'expression' : 'y*2>=4', 'result' : '(y * 2.0) >= 4.0', 'variables' : ['y']}}
+    assert tcp[2]=={'id' : 3, 'result' : {'expression' : '2*', 'error' : 'Impossible equation'}}
+    assert tcp[3]['id']==4 and tcp[3]['error'].startswith('Unknown command')
+    assert tcp[4]['id'] is None and 'error' in tcp[4]
+    assert other==tcp[:1] and unix==tcp[1:2]
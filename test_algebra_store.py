@@ -0,0 +1,34 @@
+import fractions
+
+import pytest
+
+from algebra_classes import Constant, Variable, Sum, Product, Equal, GreaterEqual
+from algebra_store import dumps, loads, write_store, EquationStore, evaluate_store
+
+def test_dumps():
+    tree = GreaterEqual(Sum(Product(Constant(fractions.Fraction(1, 3)),Variable('x')),Constant(2.5)),Variable('y'))
+    assert loads(dumps(tree))==tree
+    with pytest.raises(ValueError):
+        loads(dumps(tree)[:-2])
+
+def test_store(tmp_path):
+    path = str(tmp_path / 'equations.store')
+    equations = [Equal(Sum(Product(Constant(i),Variable('x')),Variable('y')),Constant(2 * i)) for i in range(100)]
+    assert write_store(path, iter(equations))==100
+    with EquationStore(path) as store:
+        assert len(store)==100
+        assert store.tree(7)==equations[7] and store.tree(-1)==equations[-1]
+        assert bytes(store.record(3))==dumps(equations[3])
+        assert [expression.evaluate({'x' : 2, 'y' : 0}) for expression in store]==[True] * 100
+        with pytest.raises(IndexError):
+            store[100]
+    (tmp_path / 'bad.store').write_bytes(b'ALGP\x01')
+    with pytest.raises(ValueError):
+        EquationStore(str(tmp_path / 'bad.store'))
+
+def test_evaluate_store(tmp_path):
+    path = str(tmp_path / 'equations.store')
+    write_store(path, [Equal(Product(Constant(i),Variable('x')),Constant(6)) for i in range(1, 7)])
+    expected = [False, False, True, False, False, False]
+    assert evaluate_store(path, {'x' : 2}, 1)==expected
+    assert evaluate_store(path, {'x' : 2}, 2, chunksize=2)==expected
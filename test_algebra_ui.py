@@ -0,0 +1,140 @@
+import fractions
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import algebra_classes as alg_cl
+import algebra_intervals as alg_int
+from algebra_ui import tokenize, compile_operations, parse, normalize, ParseCache, Instrumentation, report, identify, solve, batch, main
+import algebra_ui as alg_ui
+
+def test_tokenize():
+    assert tokenize('12>=3.5*x')==['12','>=','3.5','*','x']
+    assert tokenize(' speed2 + 100 ')==['speed2','+','100']
+    assert tokenize('(a<b)<=[c=d]')==['(','a','<','b',')','<=','[','c','=','d',']']
+
+def test_compile_operations():
+    assert compile_operations({'>' : None, '>=' : None})=={'>' : {None : '>', '=' : {None : '>='}}}
+
+def test_parse():
+    assert parse(alg_cl.Variable.classify(alg_cl.Constant.classify(tokenize('x+2*y+3=4'))))==alg_cl.Equal(alg_cl.Sum(alg_cl.Variable('x'),alg_cl.Product(alg_cl.Constant(2),alg_cl.Variable('y')),alg_cl.Constant(3)),alg_cl.Constant(4))
+    assert parse(alg_cl.Variable.classify(alg_cl.Constant.classify(tokenize('2*(x+1)*[y*z]'))))==alg_cl.Product(alg_cl.Constant(2),alg_cl.Sum(alg_cl.Variable('x'),alg_cl.Constant(1)),alg_cl.Variable('y'),alg_cl.Variable('z'))
+    assert parse(alg_cl.Variable.classify(alg_cl.Constant.classify(tokenize('{a+b}>=c'))))==alg_cl.LesserEqual(alg_cl.Variable('c'),alg_cl.Sum(alg_cl.Variable('a'),alg_cl.Variable('b')))
+    assert parse(alg_cl.Variable.classify(alg_cl.Constant.classify(tokenize('('*5000+'x+1'+')'*5000+'=1'))))==alg_cl.Equal(alg_cl.Sum(alg_cl.Variable('x'),alg_cl.Constant(1)),alg_cl.Constant(1))
+    with pytest.raises(ValueError):
+        parse(alg_cl.Variable.classify(alg_cl.Constant.classify(tokenize('('*5000+'x+1'+')'*4999+'=1'))))
+
+def test_normalize():
+    assert normalize(' x  +\t12.5 >= ( y * z )\n')=='x+12.5>=(y*z)'
+    assert normalize('speed  2 * x')=='speed 2*x'
+
+def test_parse_cache():
+    parse_cache = ParseCache(2)
+    parse_cache.put('a', (alg_cl.Constant(1), dict()))
+    parse_cache.put('b', (alg_cl.Constant(2), dict()))
+    assert parse_cache.get('a')[0]==alg_cl.Constant(1)
+    parse_cache.put('c', (alg_cl.Constant(3), dict()))
+    assert parse_cache.get('b') is None and parse_cache.get('c')[0]==alg_cl.Constant(3)
+    assert (len(parse_cache), parse_cache.hits, parse_cache.misses, parse_cache.evictions)==(2, 2, 1, 1)
+    parse_cache.clear()
+    assert (len(parse_cache), parse_cache.hits, parse_cache.misses, parse_cache.evictions)==(0, 0, 0, 0)
+
+def test_solve():
+    assert solve('2*x+3=11')[1]=={'x' : 4.0}
+    assert solve('x+y=3;x=1')==([alg_cl.Equal(alg_cl.Sum(alg_cl.Variable('x'),alg_cl.Variable('y')),alg_cl.Constant(3)),alg_cl.Equal(alg_cl.Variable('x'),alg_cl.Constant(1))], {'x' : 1.0, 'y' : 2.0})
+    assert solve('x+y=3')[1]=={'x' : None, 'y' : None}
+    assert solve('x>3;2*x<=10;x!=4')[1]=={'x' : alg_int.IntervalSet([(3.0, 4.0, False, False), (4.0, 5.0, False, True)])}
+    assert solve('x>3;1>2')[1]=={'x' : alg_int.IntervalSet()}
+    assert solve('2>1')[1]=={}
+    with pytest.raises(ValueError):
+        solve('1>2')
+
+def test_cached_identify(monkeypatch):
+    #cached trees render the same as trees parsed without the cache
+    monkeypatch.setattr(alg_ui, 'PARSE_CACHE', ParseCache(0))
+    uncached = str(identify('y*3+x=5')[0])
+    monkeypatch.setattr(alg_ui, 'PARSE_CACHE', ParseCache(4))
+    assert str(identify('y*3+x=5')[0])==str(identify('y*3+x=5')[0])==uncached=='((y * 3.0) + x) = 5.0'
+    assert identify('y*3+x=5')[0].interned
+
+def test_backend(monkeypatch):
+    monkeypatch.setattr(alg_cl, 'BACKEND', 'exact')
+    exp, vars_dict = solve('3*x+1=2')
+    assert vars_dict=={'x' : fractions.Fraction(1, 3)} and type(exp.lhs.parts[1].value) is int
+    assert solve('2*x+y=4.5;y=0.5')[1]=={'x' : 2, 'y' : fractions.Fraction(1, 2)}
+    assert type(solve('2*x+y=4.5;y=0.5')[1]['x']) is int
+    assert solve('3*x<1')[1]=={'x' : alg_int.IntervalSet.below(fractions.Fraction(1, 3), False)}
+    monkeypatch.setattr(alg_cl, 'BACKEND', 'float')
+    assert solve('3*x+1=2')[1]['x']==pytest.approx(1/3)
+
+def test_instrumentation(monkeypatch, capsys):
+    instrumentation = Instrumentation()
+    monkeypatch.setattr(alg_ui, 'INSTRUMENTATION', instrumentation)
+    alg_ui.PARSE_CACHE.clear()
+    events = []
+    hook = lambda event, payload: events.append((event, payload))
+    solve('3*q+1=4')
+    assert events==[] and not instrumentation.enabled
+    instrumentation.add_hook(hook)
+    instrumentation.time_stages()
+    solve('3*q+1=10')
+    assert [event for event, payload in events]==['parts', 'variables', 'identified', 'solution']
+    assert events[1]==('variables', ['q']) and events[3]==('solution', {'q' : 3.0})
+    assert sorted(instrumentation.timings)==['classify_constants', 'classify_variables', 'parse', 'solve', 'tokenize']
+    assert all(calls==1 and seconds>=0 for calls, seconds in instrumentation.timings.values())
+    instrumentation.remove_hook(hook)
+    instrumentation.time_stages(False)
+    assert not instrumentation.enabled
+    instrumentation.add_hook(report)
+    solve('2*w<4')
+    assert capsys.readouterr().out=='|identified parts: 2 , * , w , < , 4 ...\n|identified variables: w ...\n|identification successful: (2.0 * w) < 4.0 ...\n|solution: w in (-inf, 2.0) ...\n'
+
+def test_batch():
+    batch_output = io.StringIO()
+    batch(['x+1=2\n', '\n', '2*\n'], batch_output, 1)
+    assert [json.loads(line) for line in batch_output.getvalue().splitlines()]==[{'expression' : 'x+1=2', 'result' : '(x + 1.0) = 2.0', 'variables' : {'x' : 1.0}}, {'expression' : '2*', 'error' : 'Impossible equation'}]
+
+def test_batch_deep_line():
+    #deeply nested lines are solved like any other, and a bad line only fails its own record
+    deep = 'x'
+    for i in range(1000):
+        deep = '('+deep+')*2+1'
+    batch_output = io.StringIO()
+    batch(['x+1=2\n', deep+'=1\n', '2*\n', 'x*2=4\n'], batch_output, 1)
+    records = [json.loads(line) for line in batch_output.getvalue().splitlines()]
+    assert len(records)==4 and records[2]['error']=='Impossible equation'
+    assert [records[i]['variables'] for i in (0, 1, 3)]==[{'x' : 1.0}, {'x' : -1.0}, {'x' : 2.0}]
+
+def test_batch_window():
+    #a pool only reads a bounded window of lines ahead of the records it has written
+    read = []
+    def lines():
+        for i in range(40):
+            read.append(i)
+            yield 'x+'+str(i)+'=0\n'
+    class Output():
+        def __init__(self):
+            self.records = []
+            self.ahead = 0
+        def write(self, text):
+            self.ahead = max(self.ahead, len(read) - len(self.records))
+            self.records.append(json.loads(text))
+    output = Output()
+    batch(lines(), output, 2, 1)
+    assert [record['variables'] for record in output.records]==[{'x' : -float(i)} for i in range(40)]
+    assert output.ahead<=2*4
+
+def test_main(tmp_path):
+    (tmp_path / 'in.txt').write_text('x*2>=4\n')
+    main(['--batch', str(tmp_path / 'in.txt'), '--output', str(tmp_path / 'out.jsonl'), '--processes', '1'])
+    assert json.loads((tmp_path / 'out.jsonl').read_text())=={'expression' : 'x*2>=4', 'result' : '(x * 2.0) >= 4.0', 'variables' : {'x' : '[2.0, inf)'}}
+
+def test_import():
+    heavy = ('argparse', 'cProfile', 'json', 'logging', 'multiprocessing', 'numpy')
+    code = 'import sys, algebra_ui; print([name for name in '+repr(heavy)+' if name in sys.modules])'
+    result = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True)
+    assert result.stdout=='[]\n'